@@ -1,73 +1,98 @@
 from .tracknet import BallTrackerNet
+from .inference import inference_context, load_detector_model, to_model_input
+from .postprocess import hough_circles
+import threading
 import torch
 import cv2
 import numpy as np
-from scipy.spatial import distance
 from tqdm import tqdm
 
 class BallDetector:
     def __init__(self, path_model=None, device='cuda'):
-        self.model = BallTrackerNet(input_channels=9, out_channels=256)
         self.device = device
-        if path_model:
-            self.model.load_state_dict(torch.load(path_model, map_location=device))
-            self.model = self.model.to(device)
-            self.model.eval()
+        self.model, self.input_dtype = load_detector_model(BallTrackerNet(input_channels=9, out_channels=256),
+                                                           path_model, device)
+        self.model_lock = threading.Lock()
         self.width = 640
         self.height = 360
 
-    def infer_model(self, frames):
+    def infer_model(self, frames, prev_pred=None, batch_size=1):
         """ Run pretrained model on a consecutive list of frames
         :params
             frames: list of consecutive video frames
+            prev_pred: [x,y] ball prediction for the frame preceding frames[2], used when streaming
+                a video in chunks that overlap by 2 frames
+            batch_size: number of 3-frame windows stacked into one forward pass
         :return
             ball_track: list of detected ball points
         """
         ball_track = [(None, None)]*2
-        prev_pred = [None, None]
-        for num in tqdm(range(2, len(frames))):
-            img = cv2.resize(frames[num], (self.width, self.height))
-            img_prev = cv2.resize(frames[num-1], (self.width, self.height))
-            img_preprev = cv2.resize(frames[num-2], (self.width, self.height))
-            imgs = np.concatenate((img, img_prev, img_preprev), axis=2)
-            imgs = imgs.astype(np.float32)/255.0
-            imgs = np.rollaxis(imgs, 2, 0)
-            inp = np.expand_dims(imgs, axis=0)
+        if prev_pred is None:
+            prev_pred = [None, None]
+        # Every frame takes part in 3 windows, prepare it once and slide over the prepared inputs
+        window = [None] + [self.prepare_frame(frame) for frame in frames[:2]]
+        for start in tqdm(range(2, len(frames), batch_size)):
+            inputs = []
+            for num in range(start, min(start + batch_size, len(frames))):
+                window = window[1:] + [self.prepare_frame(frames[num])]
+                inputs.append(torch.cat(window[::-1]))
 
-            out = self.model(torch.from_numpy(inp).float().to(self.device))
-            output = out.argmax(dim=1).detach().cpu().numpy()
-            x_pred, y_pred = self.postprocess(output, prev_pred)
-            prev_pred = [x_pred, y_pred]
-            ball_track.append((x_pred, y_pred))
+            with self.model_lock, inference_context(self.device):
+                out = self.model(torch.stack(inputs))
+                # Intensity classes are 0-255, so the argmax comes back to the host as uint8
+                output = out.argmax(dim=1).to(torch.uint8).cpu().numpy()
+            # Outlier removal depends on the previous prediction, so postprocessing stays sequential
+            for feature_map in output:
+                x_pred, y_pred = self.postprocess(feature_map, prev_pred)
+                prev_pred = [x_pred, y_pred]
+                ball_track.append((x_pred, y_pred))
         return ball_track
 
+    def infer_model_batched(self, windows):
+        """ Run pretrained model on several independent 3-frame windows in a single forward pass
+        :params
+            windows: list of frame windows, each holding at least 3 consecutive frames prepared with
+                prepare_frame, the latest one last
+        :return
+            ball_points: list of detected ball points for the latest frame of every window
+        """
+        inp = torch.stack([torch.cat((frames[-1], frames[-2], frames[-3])) for frames in windows])
+        with self.model_lock, inference_context(self.device):
+            out = self.model(inp)
+            output = out.argmax(dim=1).to(torch.uint8).cpu().numpy()
+        return [self.postprocess(output[i], [None, None]) for i in range(len(windows))]
+
+    def prepare_frame(self, img):
+        """ Resize a frame to the model input size and move it to the device as a (3, height, width) tensor """
+        inp = torch.from_numpy(cv2.resize(img, (self.width, self.height)))
+        if self.device == 'cuda':
+            # Stage through pinned memory so the upload runs asynchronously instead of blocking the thread
+            inp = inp.pin_memory()
+        return to_model_input(inp.to(self.device, non_blocking=True), self.input_dtype)
+
     def postprocess(self, feature_map, prev_pred, scale=2, max_dist=80):
         """
         :params
-            feature_map: feature map with shape (1,360,640)
+            feature_map: integer feature map with shape (1,360,640), uint8 is fastest
             prev_pred: [x,y] coordinates of ball prediction from previous frame
             scale: scale for conversion to original shape (720,1280)
             max_dist: maximum distance from previous ball detection to remove outliers
         :return
             x,y ball coordinates
         """
-        feature_map *= 255
-        feature_map = feature_map.reshape((self.height, self.width))
-        feature_map = feature_map.astype(np.uint8)
-        ret, heatmap = cv2.threshold(feature_map, 127, 255, cv2.THRESH_BINARY)
-        circles = cv2.HoughCircles(heatmap, cv2.HOUGH_GRADIENT, dp=1, minDist=1, param1=50, param2=2, minRadius=2,
-                                   maxRadius=7)
+        # Scale into one uint8 buffer, wrapping around exactly as casting the scaled map to uint8 does, and
+        # threshold it in place
+        heatmap = np.multiply(feature_map.reshape((self.height, self.width)), 255, dtype=np.uint8, casting='unsafe')
+        cv2.threshold(heatmap, 127, 255, cv2.THRESH_BINARY, dst=heatmap)
+        circles = hough_circles(heatmap, min_dist=1, min_radius=2, max_radius=7)
         x, y = None, None
         if circles is not None:
+            # Hough returns the strongest candidates first, take the first one close to the previous detection
+            candidates = circles[0][:, :2] * scale
             if prev_pred[0]:
-                for i in range(len(circles[0])):
-                    x_temp = circles[0][i][0]*scale
-                    y_temp = circles[0][i][1]*scale
-                    dist = distance.euclidean((x_temp, y_temp), prev_pred)
-                    if dist < max_dist:
-                        x, y = x_temp, y_temp
-                        break                
+                near = np.hypot(*(candidates - np.asarray(prev_pred, dtype=np.float64)).T) < max_dist
+                if near.any():
+                    x, y = candidates[near.argmax()]
             else:
-                x = circles[0][0][0]*scale
-                y = circles[0][0][1]*scale
+                x, y = candidates[0]
         return x, y
@@ -1,8 +1,18 @@
 import catboost as ctb
-import pandas as pd
 import numpy as np
 from scipy.interpolate import CubicSpline
-from scipy.spatial import distance
+import math
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def spline_extrapolation_weights(num_points):
+    """ Weights w with CubicSpline(range(n), coords, bc_type='natural')(n) == w @ coords. A natural spline is
+    linear in the values it interpolates, so evaluated one step past the last point it is a fixed combination
+    of them
+    """
+    return CubicSpline(np.arange(num_points), np.eye(num_points), bc_type='natural')(num_points)
+
 
 class BounceDetector:
     def __init__(self, path_model=None):
@@ -15,37 +25,46 @@ class BounceDetector:
         self.model.load_model(path_model)
     
     def prepare_features(self, x_ball, y_ball):
-        labels = pd.DataFrame({'frame': range(len(x_ball)), 'x-coordinate': x_ball, 'y-coordinate': y_ball})
+        """ Build the bounce model features of every frame whose ball and 2 neighbours on either side are known
+        :params
+            x_ball: list of ball x coordinates, None where the ball is missing
+            y_ball: list of ball y coordinates, None where the ball is missing
+        :return
+            features: (frames, 12) float32 array, the x diff, diff_inv and div columns for lags 1 and 2, then the y ones
+            num_frames: list of frame numbers the feature rows belong to
+        """
+        x = np.array(x_ball, dtype=np.float64)
+        y = np.array(y_ball, dtype=np.float64)
         
         num = 3
         eps = 1e-15
+        frames = np.arange(num - 1, len(x) - num + 1)
+        x_cur, y_cur = x[frames], y[frames]
+        valid = ~np.isnan(x_cur)
+        features_x = {'diff': [], 'diff_inv': [], 'div': []}
+        features_y = {'diff': [], 'diff_inv': [], 'div': []}
         for i in range(1, num):
-            labels['x_lag_{}'.format(i)] = labels['x-coordinate'].shift(i)
-            labels['x_lag_inv_{}'.format(i)] = labels['x-coordinate'].shift(-i)
-            labels['y_lag_{}'.format(i)] = labels['y-coordinate'].shift(i)
-            labels['y_lag_inv_{}'.format(i)] = labels['y-coordinate'].shift(-i) 
-            labels['x_diff_{}'.format(i)] = abs(labels['x_lag_{}'.format(i)] - labels['x-coordinate'])
-            labels['y_diff_{}'.format(i)] = labels['y_lag_{}'.format(i)] - labels['y-coordinate']
-            labels['x_diff_inv_{}'.format(i)] = abs(labels['x_lag_inv_{}'.format(i)] - labels['x-coordinate'])
-            labels['y_diff_inv_{}'.format(i)] = labels['y_lag_inv_{}'.format(i)] - labels['y-coordinate']
-            labels['x_div_{}'.format(i)] = abs(labels['x_diff_{}'.format(i)]/(labels['x_diff_inv_{}'.format(i)] + eps))
-            labels['y_div_{}'.format(i)] = labels['y_diff_{}'.format(i)]/(labels['y_diff_inv_{}'.format(i)] + eps)
-
-        for i in range(1, num):
-            labels = labels[labels['x_lag_{}'.format(i)].notna()]
-            labels = labels[labels['x_lag_inv_{}'.format(i)].notna()]
-        labels = labels[labels['x-coordinate'].notna()] 
+            x_lag, x_lag_inv = x[frames - i], x[frames + i]
+            y_lag, y_lag_inv = y[frames - i], y[frames + i]
+            valid &= ~np.isnan(x_lag) & ~np.isnan(x_lag_inv)
+            x_diff = np.abs(x_lag - x_cur)
+            y_diff = y_lag - y_cur
+            x_diff_inv = np.abs(x_lag_inv - x_cur)
+            y_diff_inv = y_lag_inv - y_cur
+            features_x['diff'].append(x_diff)
+            features_x['diff_inv'].append(x_diff_inv)
+            features_x['div'].append(np.abs(x_diff / (x_diff_inv + eps)))
+            features_y['diff'].append(y_diff)
+            features_y['diff_inv'].append(y_diff_inv)
+            features_y['div'].append(y_diff / (y_diff_inv + eps))
         
-        colnames_x = ['x_diff_{}'.format(i) for i in range(1, num)] + \
-                     ['x_diff_inv_{}'.format(i) for i in range(1, num)] + \
-                     ['x_div_{}'.format(i) for i in range(1, num)]
-        colnames_y = ['y_diff_{}'.format(i) for i in range(1, num)] + \
-                     ['y_diff_inv_{}'.format(i) for i in range(1, num)] + \
-                     ['y_div_{}'.format(i) for i in range(1, num)]
-        colnames = colnames_x + colnames_y
-
-        features = labels[colnames]
-        return features, list(labels['frame'])
+        columns = [column for feats in (features_x, features_y) for name in ('diff', 'diff_inv', 'div')
+                   for column in feats[name]]
+        if len(frames) > 0:
+            features = np.stack(columns, axis=1, dtype=np.float32)[valid]
+        else:
+            features = np.empty((0, len(columns)), dtype=np.float32)
+        return features, frames[valid].tolist()
     
     def predict(self, x_ball, y_ball, smooth=True):
         if smooth:
@@ -69,7 +88,7 @@ class BounceDetector:
                 y_ball[num] = y_ext
                 is_none[num] = 0
                 if x_ball[num+1]:
-                    dist = distance.euclidean((x_ext, y_ext), (x_ball[num+1], y_ball[num+1]))
+                    dist = math.dist((x_ext, y_ext), (x_ball[num+1], y_ball[num+1]))
                     if dist > 80:
                         x_ball[num+1], y_ball[num+1], is_none[num+1] = None, None, 1
                 counter += 1
@@ -78,12 +97,9 @@ class BounceDetector:
         return x_ball, y_ball
 
     def extrapolate(self, x_coords, y_coords):
-        xs = list(range(len(x_coords)))
-        func_x = CubicSpline(xs, x_coords, bc_type='natural')
-        x_ext = func_x(len(x_coords))
-        func_y = CubicSpline(xs, y_coords, bc_type='natural')
-        y_ext = func_y(len(x_coords))
-        return float(x_ext), float(y_ext)    
+        weights = spline_extrapolation_weights(len(x_coords))
+        return float(weights @ np.asarray(x_coords, dtype=np.float64)), \
+            float(weights @ np.asarray(y_coords, dtype=np.float64))
 
     def postprocess(self, ind_bounce, preds):
         ind_bounce_filtered = [ind_bounce[0]]
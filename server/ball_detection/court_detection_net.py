@@ -1,64 +1,95 @@
 import cv2
 import numpy as np
+import os
+import threading
 import torch
 from .tracknet import BallTrackerNet
+from .inference import inference_context, load_detector_model, to_model_input
 import torch.nn.functional as F
 from tqdm import tqdm
-from .postprocess import refine_kps
+from .postprocess import hough_circles, refine_kps
 from .homography import get_trans_matrix, refer_kps
+from concurrent.futures import ThreadPoolExecutor
+
+# The Hough transforms in postprocess release the GIL, so the frames of a batch are postprocessed in parallel
+postprocess_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
 
 class CourtDetectorNet():
     def __init__(self, path_model=None, device='cuda'):
-        self.model = BallTrackerNet(out_channels=15)
         self.device = device
-        if path_model:
-            self.model.load_state_dict(torch.load(path_model, map_location=device))
-            self.model = self.model.to(device)
-            self.model.eval()
+        self.model, self.input_dtype = load_detector_model(BallTrackerNet(out_channels=15), path_model, device)
+        self.model_lock = threading.Lock()
             
-    def infer_model(self, frames):
+    def infer_model(self, frames, batch_size=1, verbose=False):
+        """ Run pretrained model on a list of frames, batch_size frames per forward pass
+        :params
+            frames: list of video frames
+            batch_size: number of frames stacked into one forward pass
+            verbose: print the refined keypoints of the first frame, callers streaming a video in chunks
+                set it for the first chunk only
+        :return
+            matrixes_res: list of image to court reference homographies
+            kps_res: list of detected court keypoints
+        """
         output_width = 640
         output_height = 360
         scale = 2
         
         kps_res = []
         matrixes_res = []
-        for num_frame, image in enumerate(tqdm(frames)):
-            img = cv2.resize(image, (output_width, output_height))
-            inp = (img.astype(np.float32) / 255.)
-            inp = torch.tensor(np.rollaxis(inp, 2, 0))
-            inp = inp.unsqueeze(0)
+        for start in tqdm(range(0, len(frames), batch_size)):
+            imgs = [cv2.resize(image, (output_width, output_height)) for image in frames[start:start + batch_size]]
+            inp = torch.from_numpy(np.stack(imgs))
+            if self.device == 'cuda':
+                inp = inp.pin_memory()
+            inp = to_model_input(inp.to(self.device, non_blocking=True), self.input_dtype)
             
-            out = self.model(inp.float().to(self.device))[0]
-            pred = F.sigmoid(out).detach().cpu().numpy()
+            with self.model_lock, inference_context(self.device):
+                out = self.model(inp)
+                preds = F.sigmoid(out).float().detach().cpu().numpy()
             
-            points = []
-            for kps_num in range(14):
-                heatmap = (pred[kps_num]*255).astype(np.uint8)
-                ret, heatmap = cv2.threshold(heatmap, 170, 255, cv2.THRESH_BINARY)
-                circles = cv2.HoughCircles(heatmap, cv2.HOUGH_GRADIENT, dp=1, minDist=20, param1=50, param2=2,
-                                           minRadius=10, maxRadius=25)
-                
-                if circles is not None:
-                    x_pred = circles[0][0][0]  # Don't scale yet
-                    y_pred = circles[0][0][1]
-                    if kps_num not in [8, 12, 9]:
-                        x_pred, y_pred = refine_kps(img, int(y_pred), int(x_pred), crop_size=40)
-                    # Now scale to 1280x720 space
-                    x_pred = x_pred * scale
-                    y_pred = y_pred * scale
-                    if num_frame == 0:
-                        print(f"Refined keypoint {kps_num}: ({x_pred:.1f}, {y_pred:.1f})")
-                    points.append((x_pred, y_pred))
-                else:
-                    points.append(None)
+            verbose_frames = [verbose and num_frame == 0 for num_frame in range(start, start + len(imgs))]
+            for kps, matrix_trans in postprocess_executor.map(self.postprocess, imgs, preds, [scale] * len(imgs),
+                                                             verbose_frames):
+                kps_res.append(kps)
+                matrixes_res.append(matrix_trans)
             
-            matrix_trans = get_trans_matrix(points) 
-            points = None
-            if matrix_trans is not None:
-                points = cv2.perspectiveTransform(refer_kps, matrix_trans)
-                matrix_trans = cv2.invert(matrix_trans)[1]
-            kps_res.append(points)
-            matrixes_res.append(matrix_trans)
+        return matrixes_res, kps_res
+
+    def postprocess(self, img, pred, scale, verbose=False):
+        """ Extract court keypoints and homography from the model's heatmaps for a single frame
+        :params
+            img: frame resized to the model input size
+            pred: (15, height, width) keypoint heatmaps
+            scale: scale for conversion to original shape (720,1280)
+            verbose: print the refined keypoints
+        :return
+            points: detected court keypoints
+            matrix_trans: image to court reference homography
+        """
+        points = []
+        for kps_num in range(14):
+            heatmap = (pred[kps_num]*255).astype(np.uint8)
+            ret, heatmap = cv2.threshold(heatmap, 170, 255, cv2.THRESH_BINARY)
+            circles = hough_circles(heatmap, min_dist=20, min_radius=10, max_radius=25)
             
-        return matrixes_res, kps_res
\ No newline at end of file
+            if circles is not None:
+                x_pred = circles[0][0][0]  # Don't scale yet
+                y_pred = circles[0][0][1]
+                if kps_num not in [8, 12, 9]:
+                    x_pred, y_pred = refine_kps(img, int(y_pred), int(x_pred), crop_size=40)
+                # Now scale to 1280x720 space
+                x_pred = x_pred * scale
+                y_pred = y_pred * scale
+                if verbose:
+                    print(f"Refined keypoint {kps_num}: ({x_pred:.1f}, {y_pred:.1f})")
+                points.append((x_pred, y_pred))
+            else:
+                points.append(None)
+        
+        matrix_trans = get_trans_matrix(points) 
+        points = None
+        if matrix_trans is not None:
+            points = cv2.perspectiveTransform(refer_kps, matrix_trans)
+            matrix_trans = cv2.invert(matrix_trans)[1]
+        return points, matrix_trans
\ No newline at end of file
@@ -25,6 +25,7 @@ class CourtReference:
                           *self.left_inner_line, *self.right_inner_line,
                           *self.top_inner_line, *self.bottom_inner_line,
                           *self.middle_line]
+        self.key_point_index = {point: i for i, point in enumerate(self.key_points)}
         
         self.border_points = [*self.baseline_top, *self.baseline_bottom[::-1]]
 
@@ -1,7 +1,5 @@
 from .court_reference import CourtReference
 import numpy as np
-import cv2
-from scipy.spatial import distance
 
 court_ref = CourtReference()
 refer_kps = np.array(court_ref.key_points, dtype=np.float32).reshape((-1, 1, 2))
@@ -11,29 +9,68 @@ for i in range(len(court_ref.court_conf)):
     conf = court_ref.court_conf[i+1]
     inds = []
     for j in range(4):
-        inds.append(court_ref.key_points.index(conf[j]))
+        inds.append(court_ref.key_point_index[conf[j]])
     court_conf_ind[i+1] = inds
 
+# Everything get_trans_matrix needs per court configuration, stacked in configuration order: the 4 reference
+# corners, their keypoint indices, and the keypoints (among the first 12) left over to score a homography with
+court_conf_src = np.array([court_ref.court_conf[conf_ind] for conf_ind in range(1, 13)], dtype=np.float64)
+court_conf_inds = np.array([court_conf_ind[conf_ind] for conf_ind in range(1, 13)])
+court_conf_check = np.array([[i < 12 and i not in inds for i in range(len(refer_kps))]
+                             for inds in court_conf_inds])
+refer_kps_h = np.hstack((refer_kps.reshape(-1, 2), np.ones((len(refer_kps), 1), dtype=np.float32))).astype(np.float64)
+
+def solve_homographies(src, dst):
+    """
+    Solve the homographies mapping each set of 4 src points exactly onto its 4 dst points, as
+    cv2.findHomography(src, dst, method=0) does for 4 points, in one batched linear solve
+    :params
+        src: (n, 4, 2) source points
+        dst: (n, 4, 2) destination points
+    :return
+        (n, 3, 3) homographies normalized to h33 = 1
+    """
+    # Scale both point sets to about unit size, so the 8x8 systems stay well conditioned
+    src_scale = np.abs(src).max(axis=(1, 2))
+    dst_scale = np.abs(dst).max(axis=(1, 2))
+    x, y = np.moveaxis(src / src_scale[:, None, None], -1, 0)
+    u, v = np.moveaxis(dst / dst_scale[:, None, None], -1, 0)
+    
+    a = np.zeros((len(src), 8, 8))
+    a[:, 0::2, 0], a[:, 0::2, 1], a[:, 0::2, 2] = x, y, 1
+    a[:, 1::2, 3], a[:, 1::2, 4], a[:, 1::2, 5] = x, y, 1
+    a[:, 0::2, 6], a[:, 0::2, 7] = -u * x, -u * y
+    a[:, 1::2, 6], a[:, 1::2, 7] = -v * x, -v * y
+    b = np.stack((u, v), axis=-1).reshape(-1, 8, 1)
+    h = np.concatenate((np.linalg.solve(a, b)[..., 0], np.ones((len(src), 1))), axis=1).reshape(-1, 3, 3)
+    
+    # Undo the scaling: H = diag(dst_scale, dst_scale, 1) @ h @ diag(1 / src_scale, 1 / src_scale, 1)
+    h[:, :2, :] *= dst_scale[:, None, None]
+    h[:, :, :2] /= src_scale[:, None, None]
+    return h / h[:, 2:, 2:]
+
 def get_trans_matrix(points):
     """
     Determine the best homography matrix from court points
     """
-    matrix_trans = None
-    dist_max = np.inf
-    for conf_ind in range(1, 13):
-        conf = court_ref.court_conf[conf_ind]
-
-        inds = court_conf_ind[conf_ind]
-        inters = [points[inds[0]], points[inds[1]], points[inds[2]], points[inds[3]]]
-        if None not in inters:
-            matrix, _ = cv2.findHomography(np.float32(conf), np.float32(inters), method=0)
-            trans_kps = cv2.perspectiveTransform(refer_kps, matrix).squeeze(1)
-            dists = []
-            for i in range(12):
-                if i not in inds and points[i] is not None:
-                    dists.append(distance.euclidean(points[i], trans_kps[i]))
-            dist_median = np.mean(dists)
-            if dist_median < dist_max:
-                matrix_trans = matrix
-                dist_max = dist_median
-    return matrix_trans 
\ No newline at end of file
+    detected = np.array([point is not None for point in points])
+    measured = np.array([point if point is not None else (np.nan, np.nan) for point in points], dtype=np.float64)
+    
+    # Configurations whose 4 corners were all detected, and that have other detected keypoints to score with
+    check = court_conf_check & detected
+    usable = detected[court_conf_inds].all(axis=1) & check.any(axis=1)
+    if not usable.any():
+        return None
+    check = check[usable]
+    
+    # The float32 round trip matches the precision findHomography sees the points at
+    dst = measured[court_conf_inds[usable]].astype(np.float32).astype(np.float64)
+    matrices = solve_homographies(court_conf_src[usable], dst)
+    
+    # Project the reference keypoints with every homography, as cv2.perspectiveTransform would down to its
+    # float32 output, and score each one by the mean distance to the other detected keypoints
+    trans_kps = refer_kps_h @ matrices.transpose(0, 2, 1)
+    trans_kps = (trans_kps[..., :2] / trans_kps[..., 2:]).astype(np.float32)
+    dists = np.linalg.norm(measured - trans_kps, axis=-1)
+    dist_mean = np.where(check, dists, 0).sum(axis=1) / check.sum(axis=1)
+    return matrices[np.argmin(dist_mean)]
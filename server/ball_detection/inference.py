@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+import os
+import torch
+
+try:
+    import torch_tensorrt
+except ImportError:
+    torch_tensorrt = None
+
+
+@contextmanager
+def inference_context(device):
+    """
+    Run detector models without autograd bookkeeping, with fp16 autocast on CUDA and MPS
+    """
+    half = device in ('cuda', 'mps')
+    with torch.inference_mode(), torch.autocast(device_type=device if half else 'cpu', dtype=torch.float16,
+                                                enabled=half):
+        yield
+
+
+def to_model_input(frames, dtype):
+    """ Turn uint8 (..., height, width, 3) frames already on the device into normalized (..., 3, height, width)
+    model input, so only the uint8 frames cross PCIe and the float conversion runs on the device
+    """
+    return frames.movedim(-1, -3).to(dtype).div_(255.)
+
+
+def compile_model(model, device, input_shape=None, input_dtype=torch.float32, weights_path=None):
+    """ Compile a detector model for CUDA, where per-op launch overhead dominates small batches. Builds an FP16
+    TensorRT engine when torch_tensorrt is installed, otherwise uses torch.compile with CUDA graphs
+    :params
+        model: loaded detector network in eval mode
+        device: device the model runs on, compilation is skipped anywhere but CUDA
+        input_shape: (max_batch_size, channels, height, width) of the model input, needed for TensorRT
+        input_dtype: dtype the model input is passed in
+        weights_path: model weights file, the TensorRT engine is cached next to it
+    :return
+        compiled model, or the model itself when compilation is not available
+    """
+    if device != 'cuda':
+        return model
+    if torch_tensorrt is not None and input_shape is not None:
+        try:
+            return compile_tensorrt(model, input_shape, input_dtype, weights_path)
+        except Exception as e:
+            print(f"TensorRT compilation failed, falling back to torch.compile: {e}")
+    if not hasattr(torch, 'compile'):
+        return model
+    # fp16 convolutions run on tensor cores in NHWC, keeping the weights channels-last saves a layout
+    # conversion around every conv
+    return torch.compile(model.to(memory_format=torch.channels_last), mode='reduce-overhead')
+
+
+def compile_tensorrt(model, input_shape, input_dtype, weights_path=None):
+    """ Build an FP16 TensorRT engine for batches of 1 to input_shape[0], or load it from the cache when it is
+    newer than the weights
+    """
+    engine_path = os.path.splitext(weights_path)[0] + '.trt.ep' if weights_path else None
+    if engine_path and os.path.exists(engine_path) and os.path.getmtime(engine_path) >= os.path.getmtime(weights_path):
+        return torch.export.load(engine_path).module()
+
+    max_batch_size, channels, height, width = input_shape
+    inputs = [torch_tensorrt.Input(min_shape=(1, channels, height, width), opt_shape=(1, channels, height, width),
+                                   max_shape=(max_batch_size, channels, height, width), dtype=input_dtype)]
+    trt_model = torch_tensorrt.compile(model, ir='dynamo', inputs=inputs, enabled_precisions={torch.half})
+    if engine_path:
+        example = torch.zeros((1, channels, height, width), dtype=input_dtype, device='cuda')
+        torch_tensorrt.save(trt_model, engine_path, inputs=[example])
+    return trt_model
+
+
+def quantized_model_path(weights_path):
+    return os.path.splitext(weights_path)[0] + '_int8.pt'
+
+
+def quantize_model(model, calibration_inputs, float_modules=()):
+    """ Statically quantize a detector model to INT8 for CPU inference, calibrating activation ranges on
+    sample inputs
+    :params
+        model: loaded fp32 detector network in eval mode, before ConvBlock.fuse
+        calibration_inputs: iterable of model input batches covering typical frames
+        float_modules: names of submodules kept in fp32, like an output head that is sensitive to rounding
+    :return
+        quantized model as a TorchScript module
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    for name in float_modules:
+        qconfig_mapping.set_module_name(name, None)
+
+    calibration_inputs = iter(calibration_inputs)
+    example = next(calibration_inputs)
+    prepared = prepare_fx(model, qconfig_mapping, (example,))
+    with torch.inference_mode():
+        prepared(example)
+        for inp in calibration_inputs:
+            prepared(inp)
+    quantized = convert_fx(prepared)
+    with torch.inference_mode():
+        return torch.jit.freeze(torch.jit.trace(quantized, example))
+
+
+def load_quantized_model(weights_path):
+    """ Load the INT8 model quantize_models.py built from weights_path, or None when there is none or it is
+    older than the weights
+    """
+    model_path = quantized_model_path(weights_path)
+    if not os.path.exists(model_path) or os.path.getmtime(model_path) < os.path.getmtime(weights_path):
+        return None
+    try:
+        return torch.jit.load(model_path, map_location='cpu')
+    except Exception as e:
+        print(f"Could not load quantized model {model_path}, using fp32: {e}")
+        return None
+
+
+def load_detector_model(model, path_model, device):
+    """ Load detector weights for inference on device. On CPU the INT8 build of the weights from
+    quantize_models.py replaces the fp32 model when there is one, otherwise the fp32 model is fused for
+    inference. Compiled models (TensorRT contexts, CUDA graphs) must not run from several threads at once,
+    so callers serialize their forward passes with a lock
+    :params
+        model: detector network to load the weights into
+        path_model: weights file, None keeps the model as it is
+        device: device the model runs on
+    :return
+        model ready for inference, and the dtype to prepare its inputs at - inputs are autocast to fp16 on
+        CUDA anyway, so they are prepared at half precision there
+    """
+    input_dtype = torch.float16 if device == 'cuda' else torch.float32
+    quantized_model = load_quantized_model(path_model) if path_model and device == 'cpu' else None
+    if quantized_model is not None:
+        return quantized_model, input_dtype
+    if path_model:
+        model.load_state_dict(torch.load(path_model, map_location=device))
+        model = model.to(device)
+        model.eval().fuse()
+    return model, input_dtype
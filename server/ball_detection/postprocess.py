@@ -1,7 +1,7 @@
 import cv2
 import numpy as np
 from sympy import Line
-from scipy.spatial import distance
+import math
 from sympy.geometry.point import Point2D
 
 
@@ -67,10 +67,33 @@ def merge_lines(lines):
                 if mask[i + j + 1]:
                     x1, y1, x2, y2 = line
                     x3, y3, x4, y4 = s_line
-                    dist1 = distance.euclidean((x1, y1), (x3, y3))
-                    dist2 = distance.euclidean((x2, y2), (x4, y4))
+                    dist1 = math.dist((x1, y1), (x3, y3))
+                    dist2 = math.dist((x2, y2), (x4, y4))
                     if dist1 < 20 and dist2 < 20:
                         line = np.array([int((x1+x3)/2), int((y1+y3)/2), int((x2+x4)/2), int((y2+y4)/2)])
                         mask[i + j + 1] = False
             new_lines.append(line)  
-    return new_lines       
\ No newline at end of file
+    return new_lines
+
+
+def hough_circles(heatmap, min_dist, min_radius, max_radius):
+    """
+    cv2.HoughCircles on a binary heatmap, run on the region around its nonzero pixels only. A circle's center
+    lies within max_radius of the edge pixels voting for it, so the padded crop finds the same circles, in the
+    same order, as the whole heatmap
+    :params
+        heatmap: binary uint8 heatmap
+        min_dist, min_radius, max_radius: HoughCircles parameters
+    :return
+        circles found in heatmap coordinates, None when there are none
+    """
+    x, y, width, height = cv2.boundingRect(heatmap)
+    if width == 0:
+        return None
+    pad = max_radius + 2
+    x_min, y_min = max(x - pad, 0), max(y - pad, 0)
+    circles = cv2.HoughCircles(heatmap[y_min:y + height + pad, x_min:x + width + pad], cv2.HOUGH_GRADIENT, dp=1,
+                               minDist=min_dist, param1=50, param2=2, minRadius=min_radius, maxRadius=max_radius)
+    if circles is not None:
+        circles[0, :, :2] += (x_min, y_min)
+    return circles
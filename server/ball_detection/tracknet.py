@@ -13,6 +13,32 @@ class ConvBlock(nn.Module):
     def forward(self, x):
         return self.block(x)
 
+    @torch.no_grad()
+    def fuse(self):
+        """
+        Fold the frozen BatchNorm into the convolution for inference. BN(ReLU(y)) = ReLU(s*y) + t for a positive
+        BN scale s, so the conv weights absorb s and the BN shrinks to an in-place per-channel bias add
+        """
+        conv, _, bn = self.block
+        if not isinstance(bn, nn.BatchNorm2d):
+            return
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        if (scale <= 0).any():
+            return
+        shift = bn.bias - bn.running_mean * scale
+        conv.weight.mul_(scale.view(-1, 1, 1, 1))
+        if conv.bias is not None:
+            conv.bias.mul_(scale)
+        self.block = nn.Sequential(conv, nn.ReLU(inplace=True), ChannelBias(shift))
+
+class ChannelBias(nn.Module):
+    def __init__(self, bias):
+        super().__init__()
+        self.register_buffer('bias', bias.view(1, -1, 1, 1))
+
+    def forward(self, x):
+        return x.add_(self.bias)
+
 class BallTrackerNet(nn.Module):
     def __init__(self, input_channels=3, out_channels=14):
         super().__init__()
@@ -72,6 +98,13 @@ class BallTrackerNet(nn.Module):
         x = self.conv17(x)
         x = self.conv18(x)
         return x
+
+    def fuse(self):
+        """ Fold every ConvBlock's BatchNorm into its convolution, for eval mode only """
+        for module in self.modules():
+            if isinstance(module, ConvBlock):
+                module.fuse()
+        return self
     
     def _init_weights(self):
         for module in self.modules():
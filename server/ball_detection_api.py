@@ -1,4 +1,5 @@
 from flask import Flask, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import cv2
 import numpy as np
@@ -6,20 +7,70 @@ import base64
 from ball_detection.ball_detector import BallDetector
 from ball_detection.court_detection_net import CourtDetectorNet
 from ball_detection.court_reference import CourtReference
+from ball_detection.inference import compile_model
+from inference_scheduler import BatchedInferenceScheduler
 import torch
 import os
 import mediapipe as mp
 from werkzeug.utils import secure_filename
 import uuid
+import threading
+import time
+import queue
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from contextlib import closing, contextmanager
+
+try:
+    import av
+    from av.codec.hwaccel import HWAccel
+except ImportError:
+    av = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Parse request bodies and serialize jsonify responses with orjson"""
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self.OPTIONS),
+                                        mimetype=self.mimetype)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
+# SIMD extensions OpenCV's kernels dispatch to on this CPU, a '*' marks runtime-dispatched ones
+OPENCV_CPU_FEATURES = cv2.getCPUFeaturesLine()
+
 # Configure folders
 UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'processed_videos'
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 
+# Uploaded videos are streamed through the models in chunks of frames
+VIDEO_CHUNK_SIZE = 16
+VIDEO_QUEUE_SIZE = 4
+
+# Pose and court detection rerun only once a frame has moved away from the last frame they ran on: compared
+# as grayscale thumbnails, more than MOTION_MIN_PIXELS pixels must change by more than MOTION_PIXEL_DELTA
+MOTION_THUMBNAIL_SIZE = (160, 90)
+MOTION_PIXEL_DELTA = 12
+MOTION_MIN_PIXELS = 20
+
 for folder in [UPLOAD_FOLDER, OUTPUT_FOLDER]:
     if not os.path.exists(folder):
         os.makedirs(folder)
@@ -32,34 +83,140 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 BALL_MODEL_PATH = os.path.join(PROJECT_ROOT, 'model_weights', 'model_best.pt')
 COURT_MODEL_PATH = os.path.join(PROJECT_ROOT, 'model_weights', 'model_tennis_court_det.pt')
 
+# Video batches shrink at the end of every chunk and streaming batches vary with load, let the CUDA caching
+# allocator grow its segments in place instead of fragmenting into differently sized blocks
+os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+
 # Initialize models
 device = 'cuda' if torch.cuda.is_available() else 'mps' if torch.backends.mps.is_available() else 'cpu'
+if device == 'cuda':
+    # The GPU does the heavy lifting, keep torch's CPU thread pool from competing with request threads
+    torch.set_num_threads(1)
 ball_detector = BallDetector(BALL_MODEL_PATH, device)
 court_detector = CourtDetectorNet(COURT_MODEL_PATH, device)
 court_reference = CourtReference()
 
-# Frame buffers
-frame_buffer = []
-court_buffer = []
+# MediaPipe Pose tracks landmarks across frames, so every uploaded video borrows its own instance from
+# a pool of warmed-up ones
+POSE_POOL_SIZE = 2
+pose_pool = queue.Queue()
+pose_recycler = ThreadPoolExecutor(max_workers=1)
+
+def warm_pose_detector(pose_detector):
+    """Run a blank frame through the pose graph, its first frame is several times slower than later ones"""
+    pose_detector.process(np.zeros((720, 1280, 3), np.uint8))
+    return pose_detector
+
+def recycle_pose_detector(pose_detector):
+    """Drop the landmark tracking left over from the last video and warm the restarted graph up again
+    before returning the instance to the pool"""
+    pose_detector.reset()
+    pose_pool.put(warm_pose_detector(pose_detector))
+
+@contextmanager
+def borrow_pose_detector():
+    """Take a pose detector from the pool for one video, it is recycled in the background afterwards"""
+    pose_detector = pose_pool.get()
+    try:
+        yield pose_detector
+    finally:
+        pose_recycler.submit(recycle_pose_detector, pose_detector)
+
+for _ in range(POSE_POOL_SIZE):
+    pose_pool.put(warm_pose_detector(mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=1,
+        smooth_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )))
+
+# Coalesce concurrent streaming requests into one forward pass
+BATCH_SIZE = 8
+MAX_BATCH_DELAY_MS = 10
+INFERENCE_TIMEOUT = 30
+
+# Compile the detectors on CUDA for the input shapes they are served with
+ball_detector.model = compile_model(ball_detector.model, device,
+                                   (BATCH_SIZE, 9, ball_detector.height, ball_detector.width),
+                                   ball_detector.input_dtype, BALL_MODEL_PATH)
+court_detector.model = compile_model(court_detector.model, device, (BATCH_SIZE, 3, 360, 640),
+                                    court_detector.input_dtype, COURT_MODEL_PATH)
+
+ball_scheduler = BatchedInferenceScheduler(ball_detector, BATCH_SIZE, MAX_BATCH_DELAY_MS)
+
+# Videos go through the detectors in batches too, but only on the GPU - on the CPU batching
+# doesn't speed up the forward pass and just multiplies activation memory
+VIDEO_BATCH_SIZE = BATCH_SIZE if device == 'cuda' else 1
+
+# Both detectors resize their input to 640x360, so client frames are decoded at reduced size
+DETECTOR_INPUT_SIZE = (640, 360)
+DECODE_SCALE = 2
+IMREAD_SCALE_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4}
+decode_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Frame buffers, one sliding window of prepared ball detector inputs per client session
+BUFFER_SIZE = 3
+MAX_FRAME_BYTES = 10 * 1024 * 1024
+frame_buffers = defaultdict(lambda: deque(maxlen=BUFFER_SIZE))
+buffers_lock = threading.Lock()
+
+# Sessions that stop sending frames for this many seconds lose their window
+SESSION_TTL = 60
+session_last_seen = {}
+
+def buffer_frame(session_id, frame):
+    """Prepare frame for the ball detector once, append it to the session's sliding window and return a snapshot of the window"""
+    ball_input = ball_detector.prepare_frame(frame)
+    now = time.monotonic()
+    with buffers_lock:
+        for stale_id in [sid for sid, last_seen in session_last_seen.items() if now - last_seen > SESSION_TTL]:
+            del session_last_seen[stale_id]
+            frame_buffers.pop(stale_id, None)
+        session_last_seen[session_id] = now
+        
+        frame_buffer = frame_buffers[session_id]
+        frame_buffer.append(ball_input)
+        return list(frame_buffer)
+
+@lru_cache(maxsize=128)
+def cached_matrix_inverse(matrix_bytes, dtype, shape):
+    inv_matrix = np.linalg.inv(np.frombuffer(matrix_bytes, dtype=dtype).reshape(shape))
+    inv_matrix.flags.writeable = False
+    return inv_matrix
+
+def invert_court_matrix(court_matrix):
+    """Invert a court homography, memoized so a matrix that repeats across calls (e.g. a cached
+    court calibration) is only inverted once"""
+    return cached_matrix_inverse(court_matrix.tobytes(), court_matrix.dtype.str, court_matrix.shape)
+
+def invert_court_matrices(court_matrices):
+    """Invert every per-frame court homography once, in a single batched call"""
+    inv_matrices = [None] * len(court_matrices)
+    idx = [i for i, matrix in enumerate(court_matrices) if matrix is not None]
+    if idx:
+        for i, inv_matrix in zip(idx, np.linalg.inv(np.stack([court_matrices[i] for i in idx]))):
+            inv_matrices[i] = inv_matrix
+    return inv_matrices
 
 class EnhancedBallDetector:
-    def __init__(self, ball_detector, court_detector):
+    def __init__(self, ball_detector, court_detector, ball_scheduler):
         self.ball_detector = ball_detector
         self.court_detector = court_detector
-        self.court_mask = None
+        self.ball_scheduler = ball_scheduler
+        self.court_mask = court_reference.get_court_mask(3)  # Court without margins
         self.homography_matrix = None
         
-    def detect_with_court_context(self, frames):
+    def detect_with_court_context(self, frame, ball_inputs):
         """Enhanced ball detection using court context"""
-        if len(frames) < 3:
+        if len(ball_inputs) < 3:
             return None, None, None
         
         # Get court detection for the latest frame
-        court_matrix, court_keypoints = self.detect_court(frames[-1])
+        court_matrix, court_keypoints = self.detect_court(frame)
         
-        # Standard ball detection
-        ball_track = self.ball_detector.infer_model(frames)
-        latest_ball = ball_track[-1] if ball_track else (None, None)
+        # Standard ball detection, batched with concurrent requests
+        latest_ball = self.ball_scheduler.submit(ball_inputs).result(timeout=INFERENCE_TIMEOUT)
         
         # Apply court-based filtering
         filtered_ball = self.filter_ball_with_court(latest_ball, court_matrix)
@@ -77,24 +234,29 @@ class EnhancedBallDetector:
             print(f"Court detection error: {e}")
             return None, None
     
-    def filter_ball_with_court(self, ball_position, court_matrix):
+    def filter_ball_with_court(self, ball_position, court_matrix, inv_matrix=None):
         """Filter ball detection using court boundaries"""
         if ball_position[0] is None or court_matrix is None:
             return ball_position
         
         try:
-            x, y = ball_position
-            
-            # Create court mask
-            court_mask = court_reference.get_court_mask(3)  # Court without margins
+            x, y = int(ball_position[0]), int(ball_position[1])
             
-            # Transform court mask to image coordinates
+            # Check if ball is within the frame
             h, w = 720, 1280  # Assume standard video size
-            transformed_mask = cv2.warpPerspective(court_mask, court_matrix, (w, h))
+            if not (0 <= x < w and 0 <= y < h):
+                return (None, None)
+            
+            # Map the ball pixel into reference court space instead of warping the whole mask
+            if inv_matrix is None:
+                inv_matrix = invert_court_matrix(court_matrix)
+            court_point = cv2.perspectiveTransform(np.array([[[x, y]]], dtype=np.float32), inv_matrix)
+            court_x, court_y = int(court_point[0, 0, 0]), int(court_point[0, 0, 1])
             
             # Check if ball is within court boundaries
-            if 0 <= int(x) < w and 0 <= int(y) < h:
-                if transformed_mask[int(y), int(x)] > 0:
+            mask_h, mask_w = self.court_mask.shape
+            if 0 <= court_x < mask_w and 0 <= court_y < mask_h:
+                if self.court_mask[court_y, court_x] > 0:
                     return ball_position  # Ball is within court
             
             # Ball outside court - return None or apply correction
@@ -104,20 +266,70 @@ class EnhancedBallDetector:
             print(f"Ball filtering error: {e}")
             return ball_position
 
+    def filter_ball_track_with_court(self, ball_track, court_matrices, inv_matrices=None):
+        """Vectorized filter_ball_with_court over a whole video.
+        Returns a boolean array marking the frames whose ball lies inside the court"""
+        if inv_matrices is None:
+            inv_matrices = invert_court_matrices(court_matrices)
+        in_court = np.zeros(len(ball_track), dtype=bool)
+        num_frames = min(len(ball_track), len(court_matrices))
+        idx = np.array([i for i in range(num_frames)
+                        if ball_track[i][0] is not None and court_matrices[i] is not None], dtype=np.int64)
+        if len(idx) == 0:
+            return in_court
+        
+        points = np.array([[int(ball_track[i][0]), int(ball_track[i][1]), 1] for i in idx], dtype=np.float64)
+        h, w = 720, 1280  # Assume standard video size
+        in_frame = (points[:, 0] >= 0) & (points[:, 0] < w) & (points[:, 1] >= 0) & (points[:, 1] < h)
+        
+        # Map every ball pixel into reference court space with its frame's inverse homography
+        court_points = np.einsum('nij,nj->ni', np.stack([inv_matrices[i] for i in idx]), points)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            court_points = court_points[:, :2] / court_points[:, 2:]
+        valid = in_frame & np.isfinite(court_points).all(axis=1)
+        court_x = np.zeros(len(idx), dtype=np.int64)
+        court_y = np.zeros(len(idx), dtype=np.int64)
+        court_x[valid] = court_points[valid, 0].astype(np.int64)
+        court_y[valid] = court_points[valid, 1].astype(np.int64)
+        
+        mask_h, mask_w = self.court_mask.shape
+        valid &= (court_x >= 0) & (court_x < mask_w) & (court_y >= 0) & (court_y < mask_h)
+        in_court[idx[valid]] = self.court_mask[court_y[valid], court_x[valid]] > 0
+        return in_court
+
 # Initialize enhanced detector
-enhanced_detector = EnhancedBallDetector(ball_detector, court_detector)
+enhanced_detector = EnhancedBallDetector(ball_detector, court_detector, ball_scheduler)
 
-def base64_to_cv2(base64_string):
+def base64_to_cv2(base64_string, scale=1):
     """Convert base64 string to OpenCV image"""
     if base64_string.startswith('data:image'):
-        base64_string = base64_string.split(',')[1]
+        base64_string = base64_string.partition(',')[2]
     
-    img_bytes = base64.b64decode(base64_string)
+    return bytes_to_cv2(base64.b64decode(base64_string), scale)
+
+def bytes_to_cv2(img_bytes, scale=1):
+    """Decode encoded image bytes (JPEG, PNG, ...) to OpenCV image, downscaled by 1, 2 or 4 while decoding"""
     nparr = np.frombuffer(img_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    img = cv2.imdecode(nparr, IMREAD_SCALE_FLAGS[scale])
+    
+    # Small captures would end up below the detector input size, decode those at full size instead
+    if img is not None and scale > 1 and (img.shape[1] < DETECTOR_INPUT_SIZE[0] or img.shape[0] < DETECTOR_INPUT_SIZE[1]):
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     
     return img
 
+@lru_cache(maxsize=None)
+def buffering_body(buffered, with_court):
+    payload = {'ball_detected': False, 'x': None, 'y': None}
+    if with_court:
+        payload.update({'court_detected': False, 'court_keypoints': None})
+    payload['message'] = f'Buffering frames ({buffered}/{BUFFER_SIZE})'
+    return app.json.dumps(payload).encode()
+
+def buffering_response(buffered, with_court=False):
+    """Response for a session whose window is still filling up, serialized once per frame count"""
+    return app.response_class(buffering_body(buffered, with_court), mimetype='application/json')
+
 @app.route('/detect_ball_enhanced', methods=['POST'])
 def detect_ball_enhanced():
     """Enhanced ball detection with court context"""
@@ -128,34 +340,24 @@ def detect_ball_enhanced():
         if not frame_base64:
             return jsonify({'error': 'No frame provided'}), 400
         
-        frame = base64_to_cv2(frame_base64)
+        frame = base64_to_cv2(frame_base64, DECODE_SCALE)
         print(f"Received frame shape: {frame.shape}")  # This will show (height, width, channels)
 
         if frame is None:
             return jsonify({'error': 'Invalid image data'}), 400
         
-        frame_buffer.append(frame)
-        if len(frame_buffer) > 3:
-            frame_buffer.pop(0)
-        
-        if len(frame_buffer) < 3:
-            return jsonify({
-                'ball_detected': False,
-                'x': None,
-                'y': None,
-                'court_detected': False,
-                'court_keypoints': None,
-                'message': f'Buffering frames ({len(frame_buffer)}/3)'
-            })
+        frame_buffer = buffer_frame(data.get('session_id', 'default'), frame)
+        if len(frame_buffer) < BUFFER_SIZE:
+            return buffering_response(len(frame_buffer), with_court=True)
         
         # Enhanced detection with court context
-        ball_pos, court_matrix, court_keypoints = enhanced_detector.detect_with_court_context(frame_buffer)
+        ball_pos, court_matrix, court_keypoints = enhanced_detector.detect_with_court_context(frame, frame_buffer)
         
         # Format court keypoints for JSON
         formatted_keypoints = None
         if court_keypoints is not None:
             try:
-                formatted_keypoints = [[float(kp[0, 0]), float(kp[0, 1])] for kp in court_keypoints if kp is not None]
+                formatted_keypoints = np.asarray(court_keypoints, dtype=np.float64).reshape(-1, 2).tolist()
             except:
                 formatted_keypoints = None
         
@@ -172,6 +374,21 @@ def detect_ball_enhanced():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def detect_ball_in_frame(session_id, frame):
+    """Buffer frame for the session and detect the ball in it once the window is full"""
+    frame_buffer = buffer_frame(session_id, frame)
+    if len(frame_buffer) < BUFFER_SIZE:
+        return buffering_response(len(frame_buffer))
+    
+    x, y = ball_scheduler.submit(frame_buffer).result(timeout=INFERENCE_TIMEOUT)
+    
+    return jsonify({
+        'ball_detected': x is not None and y is not None,
+        'x': float(x) if x is not None else None,
+        'y': float(y) if y is not None else None,
+        'message': 'Detection successful'
+    })
+
 @app.route('/detect_ball', methods=['POST'])
 def detect_ball():
     """Original ball detection endpoint"""
@@ -182,174 +399,355 @@ def detect_ball():
         if not frame_base64:
             return jsonify({'error': 'No frame provided'}), 400
         
-        frame = base64_to_cv2(frame_base64)
+        frame = base64_to_cv2(frame_base64, DECODE_SCALE)
         if frame is None:
             return jsonify({'error': 'Invalid image data'}), 400
         
-        frame_buffer.append(frame)
-        if len(frame_buffer) > 3:
-            frame_buffer.pop(0)
+        return detect_ball_in_frame(data.get('session_id', 'default'), frame)
         
-        if len(frame_buffer) < 3:
-            return jsonify({
-                'ball_detected': False,
-                'x': None,
-                'y': None,
-                'message': f'Buffering frames ({len(frame_buffer)}/3)'
-            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/detect_ball_raw', methods=['POST'])
+def detect_ball_raw():
+    """Ball detection on a raw encoded image body (e.g. Content-Type: image/jpeg), skipping base64"""
+    try:
+        if request.content_length is not None and request.content_length > MAX_FRAME_BYTES:
+            return jsonify({'error': 'Frame too large'}), 413
         
-        ball_track = ball_detector.infer_model(frame_buffer[-3:])
-        latest_detection = ball_track[-1] if ball_track else (None, None)
-        x, y = latest_detection
+        img_bytes = request.get_data()
+        if not img_bytes:
+            return jsonify({'error': 'No frame provided'}), 400
         
-        return jsonify({
-            'ball_detected': x is not None and y is not None,
-            'x': float(x) if x is not None else None,
-            'y': float(y) if y is not None else None,
-            'message': 'Detection successful'
-        })
+        frame = bytes_to_cv2(img_bytes, DECODE_SCALE)
+        if frame is None:
+            return jsonify({'error': 'Invalid image data'}), 400
+        
+        return detect_ball_in_frame(request.args.get('session_id', 'default'), frame)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def iter_video_frames(input_path):
+    """Yield BGR frames of a video, decoding on the GPU (NVDEC) through PyAV when available"""
+    if av is not None and device == 'cuda':
+        try:
+            container = av.open(input_path, hwaccel=HWAccel(device_type='cuda'))
+        except Exception as e:
+            print(f"Hardware decoding unavailable, falling back to OpenCV: {e}")
+        else:
+            with container:
+                for frame in container.decode(video=0):
+                    yield frame.to_ndarray(format='bgr24')
+            return
+    
+    cap = cv2.VideoCapture(input_path)
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+class AVVideoWriter:
+    """cv2.VideoWriter-compatible H.264 writer on top of PyAV"""
+    def __init__(self, output_path, codec, fps, width, height):
+        self.container = av.open(output_path, 'w')
+        try:
+            self.stream = self.container.add_stream(codec, rate=fps)
+            self.stream.width = width
+            self.stream.height = height
+            self.stream.pix_fmt = 'yuv420p'
+            self.stream.codec_context.open()
+        except Exception:
+            self.container.close()
+            raise
+    
+    def write(self, frame):
+        for packet in self.stream.encode(av.VideoFrame.from_ndarray(frame, format='bgr24')):
+            self.container.mux(packet)
+    
+    def release(self):
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+def open_video_writer(output_path, fps, width, height):
+    """Open an H.264 writer for processed videos, encoding on the GPU (NVENC, VideoToolbox) through PyAV when available"""
+    if av is not None:
+        hardware_codecs = {'cuda': ['h264_nvenc'], 'mps': ['h264_videotoolbox']}
+        codecs = hardware_codecs.get(device, []) + ['libx264']
+        for codec in codecs:
+            try:
+                return AVVideoWriter(output_path, codec, fps, width, height)
+            except Exception as e:
+                print(f"{codec} encoder unavailable: {e}")
+    
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'avc1'), fps, (width, height))
+    if not out.isOpened():
+        out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    return out
+
+POSE_CONNECTIONS = np.array(sorted(mp.solutions.pose.POSE_CONNECTIONS), dtype=np.int64)
+
+def draw_pose_landmarks(frame, pose_landmarks):
+    """Vectorized mp_drawing.draw_landmarks: all skeleton edges go out in a single polylines call"""
+    h, w = frame.shape[:2]
+    landmarks = np.array([[lm.x, lm.y, lm.visibility, lm.presence if lm.HasField('presence') else 1.0]
+                          for lm in pose_landmarks.landmark])
+    visible = ((landmarks[:, 2] >= 0.5) & (landmarks[:, 3] >= 0.5) &
+               (landmarks[:, :2] >= 0).all(axis=1) & (landmarks[:, :2] <= 1).all(axis=1))
+    points = np.minimum(np.floor(landmarks[:, :2] * (w, h)), (w - 1, h - 1)).astype(np.int32)
+    
+    # Skeleton edges between visible landmarks
+    edges = POSE_CONNECTIONS[visible[POSE_CONNECTIONS].all(axis=1)]
+    if len(edges) > 0:
+        cv2.polylines(frame, points[edges], False, (0, 0, 255), 2)
+    
+    # Landmarks with a light grey border
+    for x, y in points[visible]:
+        cv2.circle(frame, (int(x), int(y)), 3, (224, 224, 224), 2)
+        cv2.circle(frame, (int(x), int(y)), 2, (0, 255, 0), 2)
+
+def draw_filled_circles(frame, points, radius, color):
+    """Draw filled circles at all points with one polylines call: a zero-length segment drawn 2*radius thick
+    rasterizes to exactly the disk cv2.circle(frame, point, radius, color, -1) would"""
+    points = np.asarray(points, dtype=np.int32).reshape(-1, 1, 2)
+    if len(points) > 0:
+        cv2.polylines(frame, np.repeat(points, 2, axis=1), False, color, 2 * radius)
+
+def read_video_chunks(input_path, chunk_queue, chunk_size, stop):
+    """Decode a video and push chunks of (BGR frames, RGB frames for MediaPipe, motion thumbnails) to the
+    queue, None marks the end of the video. Decoding ends early once the stop event is set"""
+    try:
+        frames, rgb_frames, thumbnails = [], [], []
+        with closing(iter_video_frames(input_path)) as video_frames:
+            for frame in video_frames:
+                if stop.is_set():
+                    return
+                frames.append(frame)
+                rgb_frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                thumbnails.append(cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), MOTION_THUMBNAIL_SIZE,
+                                             interpolation=cv2.INTER_AREA))
+                if len(frames) == chunk_size:
+                    chunk_queue.put((frames, rgb_frames, thumbnails))
+                    frames, rgb_frames, thumbnails = [], [], []
+        if frames and not stop.is_set():
+            chunk_queue.put((frames, rgb_frames, thumbnails))
+    finally:
+        chunk_queue.put(None)
+
+def find_moving_frames(thumbnails, key_thumbnail):
+    """Flag the frames that moved away from the last key frame, each flagged frame becomes the new key frame.
+    Comparing against the key frame instead of the previous frame keeps slow pans from drifting unnoticed
+    :return
+        list of flags, thumbnail of the last key frame
+    """
+    moving = []
+    for thumbnail in thumbnails:
+        moved = (key_thumbnail is None or
+                 cv2.countNonZero(cv2.threshold(cv2.absdiff(thumbnail, key_thumbnail), MOTION_PIXEL_DELTA, 255,
+                                                cv2.THRESH_BINARY)[1]) > MOTION_MIN_PIXELS)
+        if moved:
+            key_thumbnail = thumbnail
+        moving.append(moved)
+    return moving, key_thumbnail
+
+# Status overlay strings and colors, indexed by whether the detection is present
+HUD_LABELS = {name: (f'{name}: NO', f'{name}: YES') for name in ('Ball', 'Court', 'Pose')}
+HUD_COLORS = ((0, 0, 255), (0, 255, 0))
+
 def process_video_with_all_features(input_path, output_path):
     """Process video with ball detection, court detection, and pose detection"""
     cap = cv2.VideoCapture(input_path)
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    # Setup output video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-    
-    # Read all frames
-    frames = []
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frames.append(frame)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     cap.release()
     
-    if len(frames) < 3:
-        raise ValueError("Video too short - need at least 3 frames")
+    # Setup output video writer
+    out = open_video_writer(output_path, fps, width, height)
     
-    print(f"Processing {len(frames)} frames...")
+    # Decode on a background thread and stream bounded chunks of frames through the models
+    chunk_queue = queue.Queue(maxsize=VIDEO_QUEUE_SIZE)
+    stop_reading = threading.Event()
+    reader = threading.Thread(target=read_video_chunks,
+                              args=(input_path, chunk_queue, VIDEO_CHUNK_SIZE, stop_reading), daemon=True)
+    reader.start()
+    try:
+        return run_video_chunks(chunk_queue, out, width, height, total_frames)
+    finally:
+        # On errors the reader may be blocked on a full queue, drain it until the reader sees the stop flag
+        stop_reading.set()
+        while reader.is_alive():
+            try:
+                chunk_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        reader.join()
+        out.release()
 
+def run_video_chunks(chunk_queue, out, width, height, total_frames):
+    """Run the detectors on the decoded chunks from the queue, draw the overlays and write the frames to out
+    :return
+        detection statistics of the video
+    """
+    print(f"Processing {total_frames} frames...")
     
+    # Static frames reuse the pose and court results of the last frame that moved
+    key_thumbnail = None
+    last_pose = None
+    last_court = (None, None)
     
-    # Run court detection
-    court_matrices, court_keypoints = court_detector.infer_model(frames)
-    
-    # Run ball detection
-    ball_track = ball_detector.infer_model(frames)
-    print(f"First ball detection sample: {ball_track[0] if ball_track else 'None'}")
-
-    print(f"Video resolution: {width}x{height}")
-    print(f"First court keypoint sample: {court_keypoints[0][0] if court_keypoints[0] is not None else 'None'}")
-    
-    # Initialize MediaPipe Pose
-    mp_pose = mp.solutions.pose
-    mp_drawing = mp.solutions.drawing_utils
-    pose = mp_pose.Pose(
-        static_image_mode=False,
-        model_complexity=1,
-        smooth_landmarks=True,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
+    def run_pose(rgb_frames, moving):
+        nonlocal last_pose
+        pose_results_list = []
+        for rgb_frame, moved in zip(rgb_frames, moving):
+            if moved or last_pose is None:
+                last_pose = pose_detector.process(rgb_frame)
+            pose_results_list.append(last_pose)
+        return pose_results_list
     
+    num_frames = 0
     ball_detections = 0
     pose_detections = 0
     court_detections = 0
     
-    # Process each frame with all overlays
-    for i, frame in enumerate(frames):
-        # MediaPipe pose detection
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pose_results = pose.process(rgb_frame)
-        
-        # Draw pose landmarks
-        if pose_results.pose_landmarks:
-            pose_detections += 1
-            mp_drawing.draw_landmarks(
-                frame, 
-                pose_results.pose_landmarks, 
-                mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-            )
-        
-        # Draw court keypoints
-        if i < len(court_keypoints) and court_keypoints[i] is not None:
-            court_detections += 1
-            for j, kp in enumerate(court_keypoints[i]):
-                if kp is not None:
-                    x, y = int(kp[0, 0]), int(kp[0, 1])
-                    cv2.circle(frame, (x, y), 8, (255, 0, 255), -1)  # Magenta for court points
-        
-        # Draw ball detection
-        if i < len(ball_track) and ball_track[i][0] is not None:
-            ball_detections += 1
-            x, y = int(ball_track[i][0]), int(ball_track[i][1])
+    # The ball model looks at 3 consecutive frames, so carry the last 2 frames and the last
+    # prediction over from the previous chunk
+    ball_context = []
+    prev_ball = None
+    
+    def write_frames(frames):
+        for frame in frames:
+            out.write(frame)
+    
+    # Pose, GPU inference and encoding each run on their own thread, the encoder works through one
+    # chunk while the next one is being inferred
+    write_future = None
+    with borrow_pose_detector() as pose_detector, ThreadPoolExecutor(max_workers=1) as executor, \
+            ThreadPoolExecutor(max_workers=1) as write_executor:
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is None:
+                break
+            frames, rgb_frames, thumbnails = chunk
+            moving, key_thumbnail = find_moving_frames(thumbnails, key_thumbnail)
+            
+            # Run pose detection on the CPU while court and ball detection run on the GPU
+            pose_future = executor.submit(run_pose, rgb_frames, moving)
+            
+            # Run court detection on the frames that moved
+            moved_matrices, moved_keypoints = court_detector.infer_model(
+                [frame for frame, moved in zip(frames, moving) if moved], VIDEO_BATCH_SIZE, verbose=num_frames == 0)
+            moved_courts = iter(zip(moved_matrices, moved_keypoints))
+            court_matrices, court_keypoints = [], []
+            for moved in moving:
+                if moved:
+                    last_court = next(moved_courts)
+                court_matrices.append(last_court[0])
+                court_keypoints.append(last_court[1])
+            
+            # Run ball detection
+            ball_track = ball_detector.infer_model(ball_context + frames, prev_ball,
+                                                   VIDEO_BATCH_SIZE)[len(ball_context):]
+            ball_context = (ball_context + frames)[-2:]
+            prev_ball = list(ball_track[-1])
+            
+            pose_results_list = pose_future.result()
             
-            # Apply court filtering if available
-            if i < len(court_matrices) and court_matrices[i] is not None:
-                filtered_ball = enhanced_detector.filter_ball_with_court(
-                    (ball_track[i][0], ball_track[i][1]), 
-                    court_matrices[i]
-                )
-                if filtered_ball[0] is not None:
-                    x, y = int(filtered_ball[0]), int(filtered_ball[1])
-                    # Green circle for court-validated ball
-                    cv2.circle(frame, (x, y), 12, (0, 255, 0), 3)
-                    cv2.circle(frame, (x, y), 4, (0, 255, 0), -1)
-                else:
-                    # Red circle for filtered out ball
+            if num_frames == 0:
+                print(f"First ball detection sample: {ball_track[0] if ball_track else 'None'}")
+                
+                print(f"Video resolution: {width}x{height}")
+                print(f"First court keypoint sample: {court_keypoints[0][0] if court_keypoints[0] is not None else 'None'}")
+            
+            # Court-validate every ball detection in the chunk in one vectorized pass
+            court_matrices_inv = invert_court_matrices(court_matrices)
+            ball_in_court = enhanced_detector.filter_ball_track_with_court(ball_track, court_matrices,
+                                                                           court_matrices_inv)
+            
+            # Process each frame with all overlays
+            for i, frame in enumerate(frames):
+                frame_num = num_frames + i
+                pose_results = pose_results_list[i]
+                
+                has_pose = bool(pose_results.pose_landmarks)
+                has_court = i < len(court_keypoints) and court_keypoints[i] is not None
+                has_ball = i < len(ball_track) and ball_track[i][0] is not None
+                
+                # Draw pose landmarks
+                if has_pose:
+                    pose_detections += 1
+                    draw_pose_landmarks(frame, pose_results.pose_landmarks)
+                
+                # Draw court keypoints
+                if has_court:
+                    court_detections += 1
+                    draw_filled_circles(frame, court_keypoints[i], 8, (255, 0, 255))  # Magenta for court points
+                
+                # Draw ball detection
+                if has_ball:
+                    ball_detections += 1
                     x, y = int(ball_track[i][0]), int(ball_track[i][1])
-                    cv2.circle(frame, (x, y), 12, (0, 0, 255), 3)
-                    cv2.circle(frame, (x, y), 4, (0, 0, 255), -1)
-            else:
-                # Yellow circle for unfiltered ball
-                cv2.circle(frame, (x, y), 12, (0, 255, 255), 3)
-                cv2.circle(frame, (x, y), 4, (0, 255, 255), -1)
-        
-        # Add comprehensive info overlay
-        overlay_y = 30
-        cv2.putText(frame, f'Frame: {i+1}/{len(frames)}', (10, overlay_y),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        cv2.putText(frame, f'Ball: {"YES" if i < len(ball_track) and ball_track[i][0] is not None else "NO"}', 
-                   (10, overlay_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
-                   (0, 255, 0) if i < len(ball_track) and ball_track[i][0] is not None else (0, 0, 255), 2)
-        
-        cv2.putText(frame, f'Court: {"YES" if i < len(court_keypoints) and court_keypoints[i] is not None else "NO"}', 
-                   (10, overlay_y + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                   (0, 255, 0) if i < len(court_keypoints) and court_keypoints[i] is not None else (0, 0, 255), 2)
-        
-        cv2.putText(frame, f'Pose: {"YES" if pose_results.pose_landmarks else "NO"}', 
-                   (10, overlay_y + 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                   (0, 255, 0) if pose_results.pose_landmarks else (0, 0, 255), 2)
-        
-        # Write frame to output video
-        out.write(frame)
+                    
+                    # Apply court filtering if available
+                    if i < len(court_matrices) and court_matrices[i] is not None:
+                        if ball_in_court[i]:
+                            # Green circle for court-validated ball
+                            cv2.circle(frame, (x, y), 12, (0, 255, 0), 3)
+                            cv2.circle(frame, (x, y), 4, (0, 255, 0), -1)
+                        else:
+                            # Red circle for filtered out ball
+                            cv2.circle(frame, (x, y), 12, (0, 0, 255), 3)
+                            cv2.circle(frame, (x, y), 4, (0, 0, 255), -1)
+                    else:
+                        # Yellow circle for unfiltered ball
+                        cv2.circle(frame, (x, y), 12, (0, 255, 255), 3)
+                        cv2.circle(frame, (x, y), 4, (0, 255, 255), -1)
+                
+                # Add comprehensive info overlay
+                overlay_y = 30
+                cv2.putText(frame, f'Frame: {frame_num+1}/{total_frames}', (10, overlay_y),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                
+                cv2.putText(frame, HUD_LABELS['Ball'][has_ball], (10, overlay_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                           HUD_COLORS[has_ball], 2)
+                
+                cv2.putText(frame, HUD_LABELS['Court'][has_court], (10, overlay_y + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                           HUD_COLORS[has_court], 2)
+                
+                cv2.putText(frame, HUD_LABELS['Pose'][has_pose], (10, overlay_y + 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                           HUD_COLORS[has_pose], 2)
+                
+                # Progress indicator
+                if (frame_num + 1) % 30 == 0:
+                    print(f"Processed {frame_num + 1}/{total_frames} frames...")
+            
+            # Write frames to output video
+            if write_future is not None:
+                write_future.result()
+            write_future = write_executor.submit(write_frames, frames)
+            
+            num_frames += len(frames)
         
-        # Progress indicator
-        if (i + 1) % 30 == 0:
-            print(f"Processed {i + 1}/{len(frames)} frames...")
+        if write_future is not None:
+            write_future.result()
     
-    out.release()
-    pose.close()
+    if num_frames < 3:
+        raise ValueError("Video too short - need at least 3 frames")
     
     return {
-        'total_frames': len(frames),
+        'total_frames': num_frames,
         'ball_detections': ball_detections,
         'court_detections': court_detections,
         'pose_detections': pose_detections,
-        'ball_detection_rate': (ball_detections / len(frames)) * 100,
-        'court_detection_rate': (court_detections / len(frames)) * 100,
-        'pose_detection_rate': (pose_detections / len(frames)) * 100
+        'ball_detection_rate': (ball_detections / num_frames) * 100,
+        'court_detection_rate': (court_detections / num_frames) * 100,
+        'pose_detection_rate': (pose_detections / num_frames) * 100
     }
 
 @app.route('/upload_video', methods=['POST'])
@@ -439,67 +837,45 @@ def analyze_shot():
     try:
         data = request.json
         frames_b64 = data.get('frames', [])
-        stroke_type = data.get('stroke_type', 'unknown')
-        cached_court = data.get('court_calibration')
 
         if len(frames_b64) < 3:
             return jsonify({'error': 'Need at least 3 frames'}), 400
 
-        # Decode frames
-        frames = []
-        for fb64 in frames_b64:
-            frame = base64_to_cv2(fb64)
-            if frame is not None:
-                frames.append(frame)
+        # Decode frames in parallel, cv2.imdecode releases the GIL
+        frames = [frame for frame in decode_executor.map(lambda fb64: base64_to_cv2(fb64, DECODE_SCALE), frames_b64)
+                  if frame is not None]
 
-        if len(frames) < 3:
-            return jsonify({'error': 'Could not decode enough frames'}), 400
+        return analyze_frames(frames, data.get('stroke_type', 'unknown'), data.get('court_calibration'))
 
-        # Run ball detection on all frames
-        ball_track = ball_detector.infer_model(frames)
+    except Exception as e:
+        import traceback
+        print(f"Shot analysis error: {traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
 
-        # Run court detection on first frame (court doesn't move)
-        court_matrix = None
-        court_kps = None
-        if cached_court is not None:
-            court_matrix = np.array(cached_court, dtype=np.float64)
-        else:
-            try:
-                matrices, keypoints = court_detector.infer_model([frames[0]])
-                court_matrix = matrices[0]
-                court_kps = keypoints[0]
-            except Exception as e:
-                print(f"Court detection failed: {e}")
-
-        # Build ball trajectory
-        trajectory = []
-        for i, (bx, by) in enumerate(ball_track):
-            if bx is not None and by is not None:
-                trajectory.append({
-                    'x': float(bx),
-                    'y': float(by),
-                    'frame_index': i
-                })
-
-        # Classify shot outcome from trajectory
-        shot_outcome = classify_shot_outcome(
-            trajectory, court_matrix, court_reference, frames[0].shape
-        )
 
-        # Format court keypoints for caching
-        formatted_court = None
-        if court_matrix is not None:
-            formatted_court = court_matrix.tolist()
+@app.route('/analyze_shot_multipart', methods=['POST'])
+def analyze_shot_multipart():
+    """Same as /analyze_shot, for multipart/form-data uploads that skip base64 and the JSON body.
+    Expects form fields:
+      - frames: one file part per encoded frame (e.g. image/jpeg), in order
+      - stroke_type: optional string
+      - court_calibration: optional cached court homography matrix, JSON-encoded
+    """
+    try:
+        frame_files = request.files.getlist('frames')
 
-        return jsonify({
-            'ball_trajectory': trajectory,
-            'ball_detection_rate': len(trajectory) / max(len(ball_track), 1),
-            'court_detected': court_matrix is not None,
-            'court_calibration': formatted_court,
-            'shot_outcome': shot_outcome,
-            'frames_analyzed': len(frames),
-            'stroke_type': stroke_type
-        })
+        if len(frame_files) < 3:
+            return jsonify({'error': 'Need at least 3 frames'}), 400
+
+        # Decode frames in parallel, cv2.imdecode releases the GIL
+        frames = [frame for frame in decode_executor.map(lambda f: bytes_to_cv2(f.read(), DECODE_SCALE), frame_files)
+                  if frame is not None]
+
+        cached_court = request.form.get('court_calibration')
+        if cached_court:
+            cached_court = app.json.loads(cached_court)
+
+        return analyze_frames(frames, request.form.get('stroke_type', 'unknown'), cached_court or None)
 
     except Exception as e:
         import traceback
@@ -507,6 +883,61 @@ def analyze_shot():
         return jsonify({'error': str(e)}), 500
 
 
+def analyze_frames(frames, stroke_type, cached_court=None):
+    """Detect the ball through decoded post-stroke frames and classify the shot, see /analyze_shot"""
+    if len(frames) < 3:
+        return jsonify({'error': 'Could not decode enough frames'}), 400
+
+    # Run ball detection on all frames
+    ball_track = ball_detector.infer_model(frames)
+
+    # Run court detection on first frame (court doesn't move)
+    court_matrix = None
+    court_kps = None
+    if cached_court is not None:
+        court_matrix = np.array(cached_court, dtype=np.float64)
+    else:
+        try:
+            matrices, keypoints = court_detector.infer_model([frames[0]])
+            court_matrix = matrices[0]
+            court_kps = keypoints[0]
+        except Exception as e:
+            print(f"Court detection failed: {e}")
+
+    # Build ball trajectory
+    trajectory = []
+    for i, (bx, by) in enumerate(ball_track):
+        if bx is not None and by is not None:
+            trajectory.append({
+                'x': float(bx),
+                'y': float(by),
+                'frame_index': i
+            })
+
+    # Ball points come back in the detectors' 1280x720 output space whatever size the frames were decoded at
+    frame_shape = (ball_detector.height * 2, ball_detector.width * 2)
+
+    # Classify shot outcome from trajectory
+    shot_outcome = classify_shot_outcome(
+        trajectory, court_matrix, court_reference, frame_shape
+    )
+
+    # Format court keypoints for caching
+    formatted_court = None
+    if court_matrix is not None:
+        formatted_court = court_matrix.tolist()
+
+    return jsonify({
+        'ball_trajectory': trajectory,
+        'ball_detection_rate': len(trajectory) / max(len(ball_track), 1),
+        'court_detected': court_matrix is not None,
+        'court_calibration': formatted_court,
+        'shot_outcome': shot_outcome,
+        'frames_analyzed': len(frames),
+        'stroke_type': stroke_type
+    })
+
+
 def classify_shot_outcome(trajectory, court_matrix, court_ref, frame_shape):
     """Determine if a shot landed in or out based on ball trajectory and court geometry."""
     result = {
@@ -521,12 +952,11 @@ def classify_shot_outcome(trajectory, court_matrix, court_ref, frame_shape):
         result['confidence'] = 0.0
         return result
 
-    # Analyze ball direction (is it moving away from player?)
-    first_detections = trajectory[:min(5, len(trajectory))]
-    last_detections = trajectory[max(0, len(trajectory)-5):]
+    ball_y = np.fromiter((d['y'] for d in trajectory), dtype=np.float64, count=len(trajectory))
 
-    avg_start_y = sum(d['y'] for d in first_detections) / len(first_detections)
-    avg_end_y = sum(d['y'] for d in last_detections) / len(last_detections)
+    # Analyze ball direction (is it moving away from player?)
+    avg_start_y = ball_y[:5].mean()
+    avg_end_y = ball_y[-5:].mean()
 
     # In most camera setups, ball moving "up" in frame = traveling toward far court
     # Ball moving "down" = traveling toward camera/near court
@@ -538,21 +968,17 @@ def classify_shot_outcome(trajectory, court_matrix, court_ref, frame_shape):
     net_y = frame_height * 0.45  # Approximate net position
 
     # Check if any detection crosses the net region
-    crossed_net = False
-    for det in trajectory:
-        if det['y'] < net_y and avg_start_y > net_y:
-            crossed_net = True
-            break
+    crossed_net = bool(avg_start_y > net_y and (ball_y < net_y).any())
     result['net_clearance'] = crossed_net
 
     # If we have court homography, determine real-world landing position
-    if court_matrix is not None and len(last_detections) > 0:
+    if court_matrix is not None:
         try:
-            last_ball = last_detections[-1]
+            last_ball = trajectory[-1]
             ball_px = np.array([[[last_ball['x'], last_ball['y']]]], dtype=np.float64)
 
             # Transform pixel coordinates to court coordinates (meters)
-            inv_matrix = cv2.invert(court_matrix)[1]
+            inv_matrix = invert_court_matrix(court_matrix)
             if inv_matrix is not None:
                 court_pos = cv2.perspectiveTransform(ball_px, inv_matrix)
                 cx, cy = float(court_pos[0][0][0]), float(court_pos[0][0][1])
@@ -585,12 +1011,27 @@ def health_check():
         'device': device,
         'ball_model_loaded': ball_detector.model is not None,
         'court_model_loaded': court_detector.model is not None,
+        'opencv_cpu_features': OPENCV_CPU_FEATURES,
         'features': ['ball_detection', 'court_detection', 'pose_detection']
     })
 
+def warmup_models():
+    """Run both detectors at every batch size they are served with, so compilation and graph capture happen
+    before the first request. Streaming batches vary with load and videos end their chunks (and their moving
+    frames, for the court) in short batches, so any size from 1 to BATCH_SIZE comes up"""
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    ball_input = ball_detector.prepare_frame(frame)
+    for batch_size in range(1, max(BATCH_SIZE, VIDEO_BATCH_SIZE) + 1):
+        ball_detector.infer_model_batched([[ball_input] * BUFFER_SIZE] * batch_size)
+        court_detector.infer_model([frame] * batch_size, batch_size)
+
 if __name__ == '__main__':
     print(f"Starting enhanced tennis analysis API on device: {device}")
+    if device == 'cuda':
+        print("Warming up compiled detector models...")
+        warmup_models()
     print("Features: Ball Detection + Court Detection + Pose Detection")
+    print(f"OpenCV SIMD: {OPENCV_CPU_FEATURES}")
     from werkzeug.serving import WSGIRequestHandler
     WSGIRequestHandler.timeout = 600
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001, threaded=True)
\ No newline at end of file
@@ -34,10 +34,11 @@ import json
 import argparse
 import os
 from datetime import datetime
-from collections import deque
-from scipy.spatial import distance
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from scipy.interpolate import CubicSpline
 from tqdm import tqdm
+from functools import lru_cache
 import math
 
 # ============================================================================
@@ -152,6 +153,7 @@ class CourtReference:
                           *self.left_inner_line, *self.right_inner_line,
                           *self.top_inner_line, *self.bottom_inner_line,
                           *self.middle_line]
+        self.key_point_index = {point: i for i, point in enumerate(self.key_points)}
 
         # Court configurations for homography
         self.court_conf = {
@@ -193,6 +195,15 @@ class CourtReference:
 # BALL DETECTOR
 # ============================================================================
 
+def to_device_input(frames, device):
+    """Upload uint8 (..., H, W, 3) frames and normalize them to float (..., 3, H, W) on the device, so only
+    a quarter of the bytes crosses the bus and the float conversion runs where the model does"""
+    frames = torch.from_numpy(frames)
+    if device == 'cuda':
+        frames = frames.pin_memory()
+    return frames.to(device, non_blocking=True).movedim(-1, -3).float().div_(255.)
+
+
 class BallDetector:
     """TrackNet-based ball detection"""
     def __init__(self, path_model=None, device='cuda'):
@@ -210,51 +221,57 @@ class BallDetector:
         self.width = 640
         self.height = 360
 
-    def infer_model(self, frames):
-        """Track ball through video frames"""
+    def infer_model(self, frames, num_frames=None):
+        """Track ball through video frames, which may be streamed from any iterable of num_frames frames"""
         if not self.enabled:
-            return [(None, None)] * len(frames)
+            return [(None, None) for _ in frames]
 
-        ball_track = [(None, None)] * 2
+        ball_track = []
         prev_pred = [None, None]
 
-        for num in tqdm(range(2, len(frames)), desc="Ball tracking"):
-            img = cv2.resize(frames[num], (self.width, self.height))
-            img_prev = cv2.resize(frames[num-1], (self.width, self.height))
-            img_preprev = cv2.resize(frames[num-2], (self.width, self.height))
-            imgs = np.concatenate((img, img_prev, img_preprev), axis=2)
-            imgs = imgs.astype(np.float32) / 255.0
-            imgs = np.rollaxis(imgs, 2, 0)
-            inp = np.expand_dims(imgs, axis=0)
+        # Every frame takes part in 3 windows, so it is resized and uploaded once and the window slides
+        # over the prepared frames, which are copied into one reused input buffer
+        window = deque(maxlen=3)
+        inp = torch.empty((1, 9, self.height, self.width), dtype=torch.float32, device=self.device)
+
+        for frame in tqdm(frames, desc="Ball tracking", total=num_frames):
+            window.append(self.prepare_frame(frame))
+            if len(window) < 3:
+                ball_track.append((None, None))
+                continue
+            inp[0, 0:3] = window[-1]
+            inp[0, 3:6] = window[-2]
+            inp[0, 6:9] = window[-3]
 
             with torch.no_grad():
-                out = self.model(torch.from_numpy(inp).float().to(self.device))
-            output = out.argmax(dim=1).detach().cpu().numpy()
+                out = self.model(inp)
+            output = out.argmax(dim=1).to(torch.uint8).cpu().numpy()
             x_pred, y_pred = self.postprocess(output, prev_pred)
             prev_pred = [x_pred, y_pred]
             ball_track.append((x_pred, y_pred))
 
         return ball_track
 
+    def prepare_frame(self, frame):
+        """Resize a frame to the model input size as a normalized (3, height, width) tensor on the device"""
+        return to_device_input(cv2.resize(frame, (self.width, self.height)), self.device)
+
     def postprocess(self, feature_map, prev_pred, scale=2, max_dist=80):
         """Extract ball position from heatmap"""
-        feature_map = (feature_map * 255).reshape((self.height, self.width)).astype(np.uint8)
-        _, heatmap = cv2.threshold(feature_map, 127, 255, cv2.THRESH_BINARY)
+        heatmap = np.multiply(feature_map.reshape((self.height, self.width)), 255, dtype=np.uint8, casting='unsafe')
+        cv2.threshold(heatmap, 127, 255, cv2.THRESH_BINARY, dst=heatmap)
         circles = cv2.HoughCircles(heatmap, cv2.HOUGH_GRADIENT, dp=1, minDist=1,
                                    param1=50, param2=2, minRadius=2, maxRadius=7)
         x, y = None, None
         if circles is not None:
+            # Hough returns the strongest candidates first, take the first one close to the previous detection
+            candidates = circles[0][:, :2] * scale
             if prev_pred[0]:
-                for i in range(len(circles[0])):
-                    x_temp = circles[0][i][0] * scale
-                    y_temp = circles[0][i][1] * scale
-                    dist = distance.euclidean((x_temp, y_temp), prev_pred)
-                    if dist < max_dist:
-                        x, y = x_temp, y_temp
-                        break
+                near = np.hypot(*(candidates - np.asarray(prev_pred, dtype=np.float64)).T) < max_dist
+                if near.any():
+                    x, y = candidates[near.argmax()]
             else:
-                x = circles[0][0][0] * scale
-                y = circles[0][0][1] * scale
+                x, y = candidates[0]
         return x, y
 
 
@@ -274,14 +291,20 @@ class CourtDetector:
         self.manual_calibration = None
         self.manual_homography = None
 
-        # Build court configuration indices
-        self.court_conf_ind = {}
-        for i in range(len(self.court_ref.court_conf)):
-            conf = self.court_ref.court_conf[i+1]
-            inds = []
-            for j in range(4):
-                inds.append(self.court_ref.key_points.index(conf[j]))
-            self.court_conf_ind[i+1] = inds
+        # The model's homographies map to reference court pixels, meters = pixels * scale + offset
+        self.meters_scale = (self.court_ref.COURT_WIDTH_M / self.court_ref.court_width,
+                             self.court_ref.COURT_LENGTH_M / self.court_ref.court_height)
+        self.meters_offset = (-self.court_ref.right_left_border * self.meters_scale[0],
+                              -self.court_ref.top_bottom_border * self.meters_scale[1])
+
+        # Build court configuration arrays, stacked in configuration order: the 4 reference corners, their
+        # keypoint indices, and the keypoints (among the first 12) left over to score a homography with
+        confs = [self.court_ref.court_conf[conf_ind] for conf_ind in range(1, len(self.court_ref.court_conf) + 1)]
+        self.court_conf_src = np.array(confs, dtype=np.float32)
+        self.court_conf_inds = np.array([[self.court_ref.key_point_index[point] for point in conf]
+                                         for conf in confs])
+        self.court_conf_check = np.array([[i < 12 and i not in inds for i in range(len(self.refer_kps))]
+                                          for inds in self.court_conf_inds])
 
         if path_model and os.path.exists(path_model):
             self.model.load_state_dict(torch.load(path_model, map_location=device))
@@ -303,21 +326,28 @@ class CourtDetector:
             self.manual_calibration = json.load(f)
 
         self.manual_homography = np.array(self.manual_calibration['homography'])
+        # Manual calibration outputs directly in meters
+        self.meters_scale = (1.0, 1.0)
+        self.meters_offset = (0.0, 0.0)
         print(f"Manual court calibration loaded from {calibration_path}")
         print(f"  Mode: {self.manual_calibration['mode']}")
         print(f"  Court: {self.manual_calibration['court_dimensions']['width']:.2f}m x {self.manual_calibration['court_dimensions']['length']:.2f}m")
         print(f"  Validation error: {self.manual_calibration['validation']['avg_error_meters']:.4f}m")
         return True
 
-    def infer_model(self, frames):
-        """Detect court keypoints and compute homography"""
+    def infer_model(self, frames, num_frames=None):
+        """Detect court keypoints and compute homography, frames may be streamed from any iterable when
+        num_frames is given"""
+        if num_frames is None:
+            num_frames = len(frames)
+
         # If manual calibration is loaded, use it for all frames
         if self.manual_homography is not None:
-            print(f"Using manual calibration for all {len(frames)} frames")
-            return [self.manual_homography] * len(frames), [None] * len(frames)
+            print(f"Using manual calibration for all {num_frames} frames")
+            return [self.manual_homography] * num_frames, [None] * num_frames
 
         if not self.enabled:
-            return [None] * len(frames), [None] * len(frames)
+            return [None] * num_frames, [None] * num_frames
 
         output_width = 640
         output_height = 360
@@ -326,14 +356,17 @@ class CourtDetector:
         kps_res = []
         matrices_res = []
 
-        for image in tqdm(frames, desc="Court detection"):
-            img = cv2.resize(image, (output_width, output_height))
-            inp = (img.astype(np.float32) / 255.)
-            inp = torch.tensor(np.rollaxis(inp, 2, 0))
-            inp = inp.unsqueeze(0)
+        # One resized frame and one model input buffer are reused for every frame
+        img = np.empty((output_height, output_width, 3), dtype=np.uint8)
+        inp = torch.empty((1, 3, output_height, output_width), dtype=torch.float32, device=self.device)
+
+        for image in tqdm(frames, desc="Court detection", total=num_frames):
+            cv2.resize(image, (output_width, output_height), dst=img)
+            inp[0] = torch.from_numpy(img).to(self.device).movedim(-1, 0)
+            inp.div_(255.)
 
             with torch.no_grad():
-                out = self.model(inp.float().to(self.device))[0]
+                out = self.model(inp)[0]
             pred = torch.sigmoid(out).detach().cpu().numpy()
 
             points = []
@@ -364,24 +397,21 @@ class CourtDetector:
         matrix_trans = None
         dist_max = np.inf
 
-        for conf_ind in range(1, 13):
-            conf = self.court_ref.court_conf[conf_ind]
-            inds = self.court_conf_ind[conf_ind]
-            inters = [points[inds[0]], points[inds[1]], points[inds[2]], points[inds[3]]]
+        detected = np.array([point is not None for point in points])
+        measured = np.array([point if point is not None else (np.nan, np.nan) for point in points],
+                            dtype=np.float32)
 
-            if None not in inters:
-                matrix, _ = cv2.findHomography(np.float32(conf), np.float32(inters), method=0)
+        for conf_src, inds, check in zip(self.court_conf_src, self.court_conf_inds, self.court_conf_check):
+            check = check & detected
+            if detected[inds].all() and check.any():
+                matrix, _ = cv2.findHomography(conf_src, measured[inds], method=0)
                 if matrix is not None:
                     trans_kps = cv2.perspectiveTransform(self.refer_kps, matrix).squeeze(1)
-                    dists = []
-                    for i in range(12):
-                        if i not in inds and points[i] is not None:
-                            dists.append(distance.euclidean(points[i], trans_kps[i]))
-                    if dists:
-                        dist_median = np.mean(dists)
-                        if dist_median < dist_max:
-                            matrix_trans = matrix
-                            dist_max = dist_median
+                    dists = np.linalg.norm(measured[check].astype(np.float64) - trans_kps[check], axis=1)
+                    dist_median = dists.mean()
+                    if dist_median < dist_max:
+                        matrix_trans = matrix
+                        dist_max = dist_median
         return matrix_trans
 
     def pixel_to_court_coords(self, pixel_pos, homography_matrix):
@@ -390,17 +420,34 @@ class CourtDetector:
             return None, None
 
         point = np.array([[pixel_pos]], dtype=np.float32)
-        court_pos = cv2.perspectiveTransform(point, homography_matrix)[0][0]
+        x, y = cv2.perspectiveTransform(point, homography_matrix)[0][0].tolist()
+        (x_scale, y_scale), (x_offset, y_offset) = self.meters_scale, self.meters_offset
+        return x * x_scale + x_offset, y * y_scale + y_offset
 
-        # Manual calibration outputs directly in meters
-        if self.manual_calibration is not None:
-            return float(court_pos[0]), float(court_pos[1])
-
-        # NN model outputs to reference court pixel space - convert to meters
-        x_meters = (court_pos[0] - self.court_ref.right_left_border) / self.court_ref.court_width * self.court_ref.COURT_WIDTH_M
-        y_meters = (court_pos[1] - self.court_ref.top_bottom_border) / self.court_ref.court_height * self.court_ref.COURT_LENGTH_M
-
-        return x_meters, y_meters
+    def pixels_to_court_coords_batch(self, pixel_positions, homography_matrices):
+        """
+        Convert many pixel positions to court coordinates (meters) at once
+        :params
+            pixel_positions: (N, 2) pixel positions, NaN where there is none
+            homography_matrices: N homography matrices, one per position, None where there is none
+        :return
+            (N, 2) court positions in meters, NaN where the position or its homography is missing
+        """
+        points = np.asarray(pixel_positions, dtype=np.float64).reshape(-1, 2)
+        court_positions = np.full(points.shape, np.nan)
+        valid = ~np.isnan(points).any(axis=1) & np.array([m is not None for m in homography_matrices], dtype=bool)
+        if not valid.any():
+            return court_positions
+
+        points_h = np.column_stack((points[valid], np.ones(valid.sum())))
+        matrices = [homography_matrices[i] for i in np.flatnonzero(valid)]
+        if all(m is matrices[0] for m in matrices):
+            # Manual calibration shares one matrix between all frames
+            projected = points_h @ np.asarray(matrices[0], dtype=np.float64).T
+        else:
+            projected = np.einsum('nij,nj->ni', np.array(matrices, dtype=np.float64), points_h)
+        court_positions[valid] = projected[:, :2] / projected[:, 2:] * self.meters_scale + self.meters_offset
+        return court_positions
 
     def is_in_court(self, x_meters, y_meters, use_singles=True, margin=0.3):
         """Check if position is within court bounds"""
@@ -427,6 +474,15 @@ class CourtDetector:
 # BOUNCE DETECTOR
 # ============================================================================
 
+@lru_cache(maxsize=None)
+def spline_extrapolation_weights(num_points):
+    """
+    Weights w with CubicSpline(range(n), coords, bc_type='natural')(n) == w @ coords. A natural spline is
+    linear in the values it interpolates, so one step past the last point it is a fixed combination of them
+    """
+    return CubicSpline(np.arange(num_points), np.eye(num_points), bc_type='natural')(num_points)
+
+
 class BounceDetector:
     """CatBoost-based bounce detection from ball trajectory"""
     def __init__(self, path_model=None):
@@ -506,7 +562,8 @@ class BounceDetector:
                      [f'y_div_{i}' for i in range(1, num)]
         colnames = colnames_x + colnames_y
 
-        features = labels[colnames]
+        # CatBoost predicts on a plain float32 array much faster than on a DataFrame
+        features = np.ascontiguousarray(labels[colnames].to_numpy(), dtype=np.float32)
         return features, list(labels['frame'])
 
     def smooth_predictions(self, x_ball, y_ball):
@@ -522,7 +579,7 @@ class BounceDetector:
                 y_ball[num] = y_ext
                 is_none[num] = 0
                 if x_ball[num+1]:
-                    dist = distance.euclidean((x_ext, y_ext), (x_ball[num+1], y_ball[num+1]))
+                    dist = math.dist((x_ext, y_ext), (x_ball[num+1], y_ball[num+1]))
                     if dist > 80:
                         x_ball[num+1], y_ball[num+1], is_none[num+1] = None, None, 1
                 counter += 1
@@ -532,12 +589,9 @@ class BounceDetector:
 
     def extrapolate(self, x_coords, y_coords):
         """Cubic spline extrapolation for missing positions"""
-        xs = list(range(len(x_coords)))
-        func_x = CubicSpline(xs, x_coords, bc_type='natural')
-        x_ext = func_x(len(x_coords))
-        func_y = CubicSpline(xs, y_coords, bc_type='natural')
-        y_ext = func_y(len(y_coords))
-        return float(x_ext), float(y_ext)
+        weights = spline_extrapolation_weights(len(x_coords))
+        return (float(weights @ np.asarray(x_coords, dtype=np.float64)),
+                float(weights @ np.asarray(y_coords, dtype=np.float64)))
 
     def postprocess(self, ind_bounce, preds):
         """Filter consecutive bounce predictions"""
@@ -611,95 +665,63 @@ class PoseAnalyzer:
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
         result = self.detector.detect(mp_image)
 
-        poses = []
-        for pose_landmarks in result.pose_landmarks:
-            landmarks = {}
-            for i, lm in enumerate(pose_landmarks):
-                landmarks[i] = {
-                    'x': lm.x,  # Normalized 0-1
-                    'y': lm.y,
-                    'z': lm.z,
-                    'visibility': lm.visibility
-                }
-            poses.append(landmarks)
-
-        return poses
+        # One (33, 4) array of normalized x, y, z and visibility per pose
+        return [np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks], dtype=np.float64)
+                for pose_landmarks in result.pose_landmarks]
 
     def get_body_scale(self, landmarks):
         """
         Calculate body scale reference (torso length) for normalization.
         This allows comparing movements across different camera distances/angles.
         """
-        try:
-            # Shoulder midpoint
-            shoulder_mid_x = (landmarks[self.LEFT_SHOULDER]['x'] + landmarks[self.RIGHT_SHOULDER]['x']) / 2
-            shoulder_mid_y = (landmarks[self.LEFT_SHOULDER]['y'] + landmarks[self.RIGHT_SHOULDER]['y']) / 2
-
-            # Hip midpoint
-            hip_mid_x = (landmarks[self.LEFT_HIP]['x'] + landmarks[self.RIGHT_HIP]['x']) / 2
-            hip_mid_y = (landmarks[self.LEFT_HIP]['y'] + landmarks[self.RIGHT_HIP]['y']) / 2
-
-            # Torso length (shoulder to hip)
-            torso_length = math.sqrt(
-                (shoulder_mid_x - hip_mid_x)**2 +
-                (shoulder_mid_y - hip_mid_y)**2
-            )
+        shoulders = landmarks[[self.LEFT_SHOULDER, self.RIGHT_SHOULDER], :2]
+        hips = landmarks[[self.LEFT_HIP, self.RIGHT_HIP], :2]
 
-            # Also calculate shoulder width for validation
-            shoulder_width = math.sqrt(
-                (landmarks[self.LEFT_SHOULDER]['x'] - landmarks[self.RIGHT_SHOULDER]['x'])**2 +
-                (landmarks[self.LEFT_SHOULDER]['y'] - landmarks[self.RIGHT_SHOULDER]['y'])**2
-            )
+        # Torso length (shoulder midpoint to hip midpoint)
+        torso_length = float(np.linalg.norm((shoulders[0] + shoulders[1]) / 2 - (hips[0] + hips[1]) / 2))
 
-            return {
-                'torso_length': torso_length,
-                'shoulder_width': shoulder_width,
-                'torso_to_shoulder_ratio': torso_length / shoulder_width if shoulder_width > 0 else 0
-            }
-        except (KeyError, ZeroDivisionError):
-            return None
+        # Also calculate shoulder width for validation
+        shoulder_width = float(np.linalg.norm(shoulders[0] - shoulders[1]))
+
+        return {
+            'torso_length': torso_length,
+            'shoulder_width': shoulder_width,
+            'torso_to_shoulder_ratio': torso_length / shoulder_width if shoulder_width > 0 else 0
+        }
 
     def detect_camera_angle(self, landmarks):
         """
         Estimate camera viewing angle from shoulder positions.
         Returns angle in degrees: 0 = behind, 90 = side view, 180 = front
         """
-        try:
-            left_shoulder = landmarks[self.LEFT_SHOULDER]
-            right_shoulder = landmarks[self.RIGHT_SHOULDER]
-
-            dx = right_shoulder['x'] - left_shoulder['x']
-            dy = right_shoulder['y'] - left_shoulder['y']
-
-            # Angle of shoulder line
-            angle_rad = math.atan2(dy, dx)
-            angle_deg = abs(math.degrees(angle_rad))
-
-            # Shoulder width in image
-            shoulder_width = math.sqrt(dx**2 + dy**2)
-
-            # Depth difference (z) can indicate rotation
-            dz = abs(right_shoulder['z'] - left_shoulder['z'])
-
-            # Classify view type
-            if shoulder_width < 0.05:
-                view_type = 'extreme_side'  # Shoulders almost overlapping = pure side view
-            elif dz > 0.1:
-                view_type = 'angled'
-            elif abs(angle_deg) < 20:
-                view_type = 'front_or_back'
-            else:
-                view_type = 'side'
+        dx, dy, dz = landmarks[self.RIGHT_SHOULDER, :3] - landmarks[self.LEFT_SHOULDER, :3]
 
-            return {
-                'shoulder_angle_deg': angle_deg,
-                'shoulder_width_norm': shoulder_width,
-                'depth_difference': dz,
-                'view_type': view_type,
-                'suitable_for_analysis': view_type not in ['extreme_side']
-            }
-        except KeyError:
-            return None
+        # Angle of shoulder line
+        angle_deg = abs(math.degrees(math.atan2(dy, dx)))
+
+        # Shoulder width in image
+        shoulder_width = math.sqrt(dx**2 + dy**2)
+
+        # Depth difference (z) can indicate rotation
+        dz = abs(float(dz))
+
+        # Classify view type
+        if shoulder_width < 0.05:
+            view_type = 'extreme_side'  # Shoulders almost overlapping = pure side view
+        elif dz > 0.1:
+            view_type = 'angled'
+        elif abs(angle_deg) < 20:
+            view_type = 'front_or_back'
+        else:
+            view_type = 'side'
+
+        return {
+            'shoulder_angle_deg': angle_deg,
+            'shoulder_width_norm': shoulder_width,
+            'depth_difference': dz,
+            'view_type': view_type,
+            'suitable_for_analysis': view_type not in ['extreme_side']
+        }
 
     def calculate_metrics(self, landmarks, prev_landmarks, dt, body_scale):
         """
@@ -713,17 +735,15 @@ class PoseAnalyzer:
         torso = body_scale['torso_length']
         metrics = {}
 
-        # Wrist velocities (body-relative: torso-lengths per second)
-        for side, wrist_idx in [('left', self.LEFT_WRIST), ('right', self.RIGHT_WRIST)]:
-            if prev_landmarks:
-                dx = landmarks[wrist_idx]['x'] - prev_landmarks[wrist_idx]['x']
-                dy = landmarks[wrist_idx]['y'] - prev_landmarks[wrist_idx]['y']
-                pixel_velocity = math.sqrt(dx**2 + dy**2) / dt
-                metrics[f'{side}_wrist_velocity_raw'] = pixel_velocity
-                metrics[f'{side}_wrist_velocity_normalized'] = pixel_velocity / torso  # Torso-lengths/sec
-            else:
-                metrics[f'{side}_wrist_velocity_raw'] = 0
-                metrics[f'{side}_wrist_velocity_normalized'] = 0
+        # Wrist velocities (body-relative: torso-lengths per second), left then right
+        wrists = [self.LEFT_WRIST, self.RIGHT_WRIST]
+        if prev_landmarks is not None:
+            velocities = np.linalg.norm(landmarks[wrists, :2] - prev_landmarks[wrists, :2], axis=1) / dt
+        else:
+            velocities = np.zeros(2)
+        for side, pixel_velocity in zip(('left', 'right'), velocities.tolist()):
+            metrics[f'{side}_wrist_velocity_raw'] = pixel_velocity
+            metrics[f'{side}_wrist_velocity_normalized'] = pixel_velocity / torso  # Torso-lengths/sec
 
         # Peak velocity (max of both wrists)
         metrics['peak_velocity_normalized'] = max(
@@ -731,50 +751,37 @@ class PoseAnalyzer:
             metrics['right_wrist_velocity_normalized']
         )
 
-        # Elbow angles
-        for side, shoulder, elbow, wrist in [
-            ('left', self.LEFT_SHOULDER, self.LEFT_ELBOW, self.LEFT_WRIST),
-            ('right', self.RIGHT_SHOULDER, self.RIGHT_ELBOW, self.RIGHT_WRIST)
-        ]:
-            angle = self._calculate_angle(
-                landmarks[shoulder], landmarks[elbow], landmarks[wrist]
-            )
-            metrics[f'{side}_elbow_angle'] = angle
+        # Elbow and knee angles in one pass: left elbow, right elbow, left knee, right knee
+        left_elbow, right_elbow, left_knee, right_knee = self._calculate_angles(landmarks, [
+            (self.LEFT_SHOULDER, self.LEFT_ELBOW, self.LEFT_WRIST),
+            (self.RIGHT_SHOULDER, self.RIGHT_ELBOW, self.RIGHT_WRIST),
+            (self.LEFT_HIP, self.LEFT_KNEE, self.LEFT_ANKLE),
+            (self.RIGHT_HIP, self.RIGHT_KNEE, self.RIGHT_ANKLE)
+        ])
+        metrics['left_elbow_angle'] = left_elbow
+        metrics['right_elbow_angle'] = right_elbow
 
         # Hip-shoulder separation (rotation)
-        hip_angle = math.degrees(math.atan2(
-            landmarks[self.RIGHT_HIP]['y'] - landmarks[self.LEFT_HIP]['y'],
-            landmarks[self.RIGHT_HIP]['x'] - landmarks[self.LEFT_HIP]['x']
-        ))
-        shoulder_angle = math.degrees(math.atan2(
-            landmarks[self.RIGHT_SHOULDER]['y'] - landmarks[self.LEFT_SHOULDER]['y'],
-            landmarks[self.RIGHT_SHOULDER]['x'] - landmarks[self.LEFT_SHOULDER]['x']
-        ))
+        hip_dx, hip_dy = landmarks[self.RIGHT_HIP, :2] - landmarks[self.LEFT_HIP, :2]
+        shoulder_dx, shoulder_dy = landmarks[self.RIGHT_SHOULDER, :2] - landmarks[self.LEFT_SHOULDER, :2]
+        hip_angle = math.degrees(math.atan2(hip_dy, hip_dx))
+        shoulder_angle = math.degrees(math.atan2(shoulder_dy, shoulder_dx))
         metrics['hip_shoulder_separation'] = abs(shoulder_angle - hip_angle)
 
         # Knee bend (average of both knees)
-        left_knee_angle = self._calculate_angle(
-            landmarks[self.LEFT_HIP], landmarks[self.LEFT_KNEE], landmarks[self.LEFT_ANKLE]
-        )
-        right_knee_angle = self._calculate_angle(
-            landmarks[self.RIGHT_HIP], landmarks[self.RIGHT_KNEE], landmarks[self.RIGHT_ANKLE]
-        )
-        metrics['knee_bend'] = (left_knee_angle + right_knee_angle) / 2
+        metrics['knee_bend'] = (left_knee + right_knee) / 2
 
         return metrics
 
-    def _calculate_angle(self, p1, p2, p3):
-        """Calculate angle at p2 given three points"""
-        try:
-            v1 = np.array([p1['x'] - p2['x'], p1['y'] - p2['y']])
-            v2 = np.array([p3['x'] - p2['x'], p3['y'] - p2['y']])
+    def _calculate_angles(self, landmarks, joints):
+        """Calculate the angle at p2 for every (p1, p2, p3) triple of landmark indices"""
+        points = landmarks[np.array(joints), :2]
+        v1 = points[:, 0] - points[:, 1]
+        v2 = points[:, 2] - points[:, 1]
 
-            cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-10)
-            cos_angle = np.clip(cos_angle, -1, 1)
-            angle = np.degrees(np.arccos(cos_angle))
-            return angle
-        except:
-            return 0
+        cos_angle = (v1 * v2).sum(axis=1) / (np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1) + 1e-10)
+        cos_angle = np.clip(cos_angle, -1, 1)
+        return np.degrees(np.arccos(cos_angle)).tolist()
 
 
 # ============================================================================
@@ -789,127 +796,124 @@ class ShotSegmenter:
         self.min_shot_frames = int(fps * 0.3)  # Minimum 0.3 seconds per shot
         self.max_shot_frames = int(fps * 3.0)  # Maximum 3 seconds per shot
 
-    def segment_shots(self, ball_track, bounce_frames, homography_matrices, court_detector):
+    def segment_shots(self, ball_positions, bounce_frames, homography_matrices, court_detector):
         """
         Segment ball trajectory into individual shots.
 
         A shot is defined as:
         - Ball moving in one direction
         - Ends at bounce or direction change
+
+        ball_positions is an (N, 2) array of ball pixel positions, NaN where the ball is missing.
         """
+        track = np.asarray(ball_positions, dtype=np.float64).reshape(-1, 2)
+        known = ~np.isnan(track[:, 0])
+        valid_frames = np.flatnonzero(known)
+        positions = track[valid_frames]
+        sorted_bounces = np.array(sorted(bounce_frames), dtype=np.int64)
+        bounces = sorted_bounces[(sorted_bounces >= 0) & (sorted_bounces < len(track))]
+        bounces = bounces[known[bounces]]
+        # Court position of every frame, converted once for all shots
+        court_track = court_detector.pixels_to_court_coords_batch(track, homography_matrices)
+        # Pixel distance the ball moved into every frame, 0 where it is unknown
+        pixel_speeds = np.zeros(len(track))
+        pixel_speeds[1:] = np.nan_to_num(np.hypot(*np.diff(track, axis=0).T))
+
+        # Significant movements between consecutive known positions
+        moves = np.diff(positions, axis=0)
+        significant = (np.abs(moves) > 5).any(axis=1)
+        move_frames = valid_frames[1:][significant]
+        moves = moves[significant]
+
+        # A movement is compared with the previous one unless a bounce reset the direction in between,
+        # the direction changes by more than 90 degrees exactly when the dot product is negative
+        has_prev = np.zeros(len(move_frames), dtype=bool)
+        has_prev[1:] = np.searchsorted(bounces, move_frames[:-1]) == np.searchsorted(bounces, move_frames[1:])
+        is_reversal = has_prev.copy()
+        is_reversal[1:] &= np.einsum('ij,ij->i', moves[1:], moves[:-1]) < 0
+
+        # Only shot starts, direction reversals and bounces can change the segmentation,
+        # movements are handled before a bounce on the same frame
+        events = sorted([(frame, 0) for frame in move_frames[~has_prev | is_reversal].tolist()] +
+                        [(frame, 1) for frame in bounces.tolist()])
+
         shots = []
         current_shot_start = None
-        prev_valid_pos = None
-        prev_direction = None
-
-        for frame_idx, (x, y) in enumerate(ball_track):
-            if x is None:
-                continue
-
-            if prev_valid_pos is not None:
-                # Calculate direction
-                dx = x - prev_valid_pos[0]
-                dy = y - prev_valid_pos[1]
-
-                if abs(dx) > 5 or abs(dy) > 5:  # Significant movement
-                    current_direction = math.atan2(dy, dx)
-
-                    # Check for direction change (new shot)
-                    if prev_direction is not None:
-                        angle_change = abs(current_direction - prev_direction)
-                        if angle_change > math.pi:
-                            angle_change = 2 * math.pi - angle_change
-
-                        # Direction reversal indicates new shot
-                        if angle_change > math.pi / 2:  # >90 degree change
-                            if current_shot_start is not None:
-                                shot = self._create_shot(
-                                    current_shot_start, frame_idx - 1,
-                                    ball_track, bounce_frames,
-                                    homography_matrices, court_detector
-                                )
-                                if shot:
-                                    shots.append(shot)
-                            current_shot_start = frame_idx
-
-                    if current_shot_start is None:
-                        current_shot_start = frame_idx
-
-                    prev_direction = current_direction
-
-            # Check if this frame is a bounce
-            if frame_idx in bounce_frames:
+        for frame_idx, is_bounce in events:
+            if not is_bounce:
+                # Direction reversal indicates new shot
                 if current_shot_start is not None:
                     shot = self._create_shot(
-                        current_shot_start, frame_idx,
-                        ball_track, bounce_frames,
-                        homography_matrices, court_detector
+                        current_shot_start, frame_idx - 1,
+                        track, pixel_speeds, sorted_bounces,
+                        court_track, court_detector
                     )
                     if shot:
                         shots.append(shot)
-                    current_shot_start = None
-                    prev_direction = None
-
-            prev_valid_pos = (x, y)
+                current_shot_start = frame_idx
+            elif current_shot_start is not None:
+                shot = self._create_shot(
+                    current_shot_start, frame_idx,
+                    track, pixel_speeds, sorted_bounces,
+                    court_track, court_detector
+                )
+                if shot:
+                    shots.append(shot)
+                current_shot_start = None
 
         # Handle last shot
-        if current_shot_start is not None and len(ball_track) - current_shot_start > self.min_shot_frames:
+        if current_shot_start is not None and len(track) - current_shot_start > self.min_shot_frames:
             shot = self._create_shot(
-                current_shot_start, len(ball_track) - 1,
-                ball_track, bounce_frames,
-                homography_matrices, court_detector
+                current_shot_start, len(track) - 1,
+                track, pixel_speeds, sorted_bounces,
+                court_track, court_detector
             )
             if shot:
                 shots.append(shot)
 
         return shots
 
-    def _create_shot(self, start_frame, end_frame, ball_track, bounce_frames,
-                     homography_matrices, court_detector):
+    def _create_shot(self, start_frame, end_frame, track, pixel_speeds, sorted_bounces,
+                     court_track, court_detector):
         """Create shot data structure"""
         if end_frame - start_frame < self.min_shot_frames:
             return None
 
         # Find contact point (highest velocity point in first third of shot)
         contact_frame = start_frame
-        max_vel = 0
         search_end = start_frame + (end_frame - start_frame) // 3
 
-        for i in range(start_frame + 1, min(search_end, len(ball_track))):
-            if ball_track[i][0] is not None and ball_track[i-1][0] is not None:
-                dx = ball_track[i][0] - ball_track[i-1][0]
-                dy = ball_track[i][1] - ball_track[i-1][1]
-                vel = math.sqrt(dx**2 + dy**2)
-                if vel > max_vel:
-                    max_vel = vel
-                    contact_frame = i
+        velocities = pixel_speeds[start_frame + 1:search_end]
+        if len(velocities) > 0:
+            fastest = velocities.argmax()
+            if velocities[fastest] > 0:
+                contact_frame = start_frame + 1 + int(fastest)
 
         # Find landing position (bounce or last known position)
         landing_frame = end_frame
-        landing_pos = ball_track[end_frame] if end_frame < len(ball_track) else (None, None)
 
         # Check if any bounce in this shot
-        shot_bounces = [b for b in bounce_frames if start_frame <= b <= end_frame]
-        if shot_bounces:
-            landing_frame = shot_bounces[-1]  # Last bounce
-            landing_pos = ball_track[landing_frame]
+        first = np.searchsorted(sorted_bounces, start_frame, side='left')
+        last = np.searchsorted(sorted_bounces, end_frame, side='right')
+        if last > first:
+            landing_frame = int(sorted_bounces[last - 1])  # Last bounce
+
+        landing_pos = (None, None)
+        if landing_frame < len(track) and not np.isnan(track[landing_frame, 0]):
+            landing_pos = tuple(track[landing_frame].tolist())
 
         # Determine if shot landed in court
         outcome = 'unknown'
         landing_court_pos = (None, None)
 
-        if landing_pos[0] is not None and homography_matrices[landing_frame] is not None:
-            landing_court_pos = court_detector.pixel_to_court_coords(
-                landing_pos, homography_matrices[landing_frame]
-            )
-            if landing_court_pos[0] is not None:
-                is_in = court_detector.is_in_court(*landing_court_pos)
-                outcome = 'in' if is_in else 'out'
+        if landing_frame < len(court_track) and not np.isnan(court_track[landing_frame, 0]):
+            landing_court_pos = tuple(court_track[landing_frame].tolist())
+            is_in = court_detector.is_in_court(*landing_court_pos)
+            outcome = 'in' if is_in else 'out'
 
         # Calculate ball speed
         ball_speed_mps = self._calculate_ball_speed(
-            ball_track, contact_frame, min(contact_frame + 5, end_frame),
-            homography_matrices, court_detector
+            court_track, contact_frame, min(contact_frame + 5, end_frame)
         )
 
         return {
@@ -926,33 +930,21 @@ class ShotSegmenter:
             'duration_seconds': (end_frame - start_frame) / self.fps
         }
 
-    def _calculate_ball_speed(self, ball_track, start_frame, end_frame,
-                              homography_matrices, court_detector):
+    def _calculate_ball_speed(self, court_track, start_frame, end_frame):
         """Calculate average ball speed in m/s using court coordinates"""
-        valid_positions = []
-
-        for i in range(start_frame, min(end_frame + 1, len(ball_track))):
-            if ball_track[i][0] is not None and homography_matrices[i] is not None:
-                court_pos = court_detector.pixel_to_court_coords(
-                    ball_track[i], homography_matrices[i]
-                )
-                if court_pos[0] is not None:
-                    valid_positions.append((i, court_pos))
+        frames = np.arange(start_frame, min(end_frame + 1, len(court_track)))
+        court_positions = court_track[frames]
+        valid = ~np.isnan(court_positions[:, 0])
+        valid_frames = frames[valid]
+        valid_positions = court_positions[valid]
 
         if len(valid_positions) < 2:
             return None
 
         # Calculate average speed
-        total_distance = 0
-        total_frames = 0
-
-        for i in range(1, len(valid_positions)):
-            frame_diff = valid_positions[i][0] - valid_positions[i-1][0]
-            dx = valid_positions[i][1][0] - valid_positions[i-1][1][0]
-            dy = valid_positions[i][1][1] - valid_positions[i-1][1][1]
-            dist = math.sqrt(dx**2 + dy**2)
-            total_distance += dist
-            total_frames += frame_diff
+        steps = np.diff(valid_positions, axis=0)
+        total_distance = float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+        total_frames = int(valid_frames[-1] - valid_frames[0])
 
         if total_frames == 0:
             return None
@@ -1011,6 +1003,25 @@ class StrokeClassifier:
 # COMPREHENSIVE CALIBRATION SYSTEM
 # ============================================================================
 
+def read_video_frames(video_path, frame_indices=None, max_frames=None):
+    """Yield (frame index, frame) for the requested frames of a video. Every frame is grabbed to keep the
+    position, but only requested ones are retrieved, which skips their color conversion and copy"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        num_frame = 0
+        while max_frames is None or num_frame < max_frames:
+            if not cap.grab():
+                break
+            if frame_indices is None or num_frame in frame_indices:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield num_frame, frame
+            num_frame += 1
+    finally:
+        cap.release()
+
+
 class ComprehensiveCalibrator:
     """Main calibration system integrating all components"""
 
@@ -1060,43 +1071,43 @@ class ComprehensiveCalibrator:
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
 
         print(f"Video: {width}x{height} @ {fps:.1f}fps, {total_frames} frames")
 
         if width != 1280 or height != 720:
             print(f"WARNING: Expected 1280x720 for optimal court detection, got {width}x{height}")
 
-        # Read all frames
-        frames = []
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frames.append(frame)
-            if max_frames and len(frames) >= max_frames:
-                break
-        cap.release()
-
-        print(f"Loaded {len(frames)} frames")
+        # Frames are streamed from the video for every pass instead of being held in memory, decoding
+        # again is far cheaper than the models and keeps memory independent of the video length
+        max_frames = max_frames or None
+        expected_frames = min(total_frames, max_frames) if max_frames else total_frames
 
         # Initialize shot segmenter
         shot_segmenter = ShotSegmenter(fps)
 
         # Step 1: Ball tracking
         print("\n[1/4] Ball tracking...")
-        ball_track = self.ball_detector.infer_model(frames)
-        ball_detections = sum(1 for x, y in ball_track if x is not None)
-        print(f"  Ball detected in {ball_detections}/{len(frames)} frames ({100*ball_detections/len(frames):.1f}%)")
+        ball_track = self.ball_detector.infer_model(
+            (frame for _, frame in read_video_frames(video_path, max_frames=max_frames)), expected_frames
+        )
+        num_frames = len(ball_track)
+        print(f"  Read {num_frames} frames")
+        ball_positions = np.array(ball_track, dtype=np.float64).reshape(-1, 2)  # None becomes NaN
+        ball_detections = int(np.count_nonzero(~np.isnan(ball_positions[:, 0])))
+        print(f"  Ball detected in {ball_detections}/{num_frames} frames ({100*ball_detections/num_frames:.1f}%)")
 
         # Step 2: Court detection
         print("\n[2/4] Court detection...")
-        homography_matrices, court_keypoints = self.court_detector.infer_model(frames)
+        homography_matrices, court_keypoints = self.court_detector.infer_model(
+            (frame for _, frame in read_video_frames(video_path, max_frames=num_frames)), num_frames
+        )
         court_detections = sum(1 for m in homography_matrices if m is not None)
         using_manual_calibration = self.court_detector.manual_calibration is not None
         if using_manual_calibration:
-            print(f"  Using manual calibration for all {len(frames)} frames (100.0%)")
+            print(f"  Using manual calibration for all {num_frames} frames (100.0%)")
         else:
-            print(f"  Court detected in {court_detections}/{len(frames)} frames ({100*court_detections/len(frames):.1f}%)")
+            print(f"  Court detected in {court_detections}/{num_frames} frames ({100*court_detections/num_frames:.1f}%)")
 
         # Step 3: Bounce detection
         print("\n[3/4] Bounce detection...")
@@ -1108,22 +1119,24 @@ class ComprehensiveCalibrator:
         # Step 4: Shot segmentation
         print("\n[4/4] Shot segmentation & pose analysis...")
         shots = shot_segmenter.segment_shots(
-            ball_track, bounce_frames, homography_matrices, self.court_detector
+            ball_positions, bounce_frames, homography_matrices, self.court_detector
         )
         print(f"  Segmented {len(shots)} shots")
 
+        # Only the contact frames and the frames before them are read back for pose analysis
+        pose_frame_indices = {shot['contact_frame'] for shot in shots}
+        pose_frame_indices |= {contact_frame - 1 for contact_frame in pose_frame_indices if contact_frame > 0}
+        frames = dict(read_video_frames(video_path, pose_frame_indices, num_frames))
+
         # Analyze each shot with pose data
         calibration_data = []
         camera_angles = []
         body_scales = []
 
-        for shot_idx, shot in enumerate(tqdm(shots, desc="Analyzing shots")):
-            # Get pose at contact frame
+        shot_poses = zip(tqdm(shots, desc="Analyzing shots"), self._iter_shot_poses(frames, shots))
+        for shot_idx, (shot, (poses, prev_poses)) in enumerate(shot_poses):
+            # Pose at contact frame
             contact_frame = shot['contact_frame']
-            if contact_frame >= len(frames):
-                continue
-
-            poses = self.pose_analyzer.detect(frames[contact_frame])
             if not poses:
                 continue
 
@@ -1144,12 +1157,8 @@ class ComprehensiveCalibrator:
                 if not camera_angle.get('suitable_for_analysis', True):
                     continue
 
-            # Get previous frame pose for velocity calculation
-            prev_landmarks = None
-            if contact_frame > 0:
-                prev_poses = self.pose_analyzer.detect(frames[contact_frame - 1])
-                if prev_poses:
-                    prev_landmarks = prev_poses[0]
+            # Previous frame pose for velocity calculation
+            prev_landmarks = prev_poses[0] if prev_poses else None
 
             # Calculate metrics
             dt = 1.0 / fps
@@ -1210,8 +1219,8 @@ class ComprehensiveCalibrator:
                 'total_frames': total_frames
             },
             'detection_stats': {
-                'ball_detection_rate': ball_detections / len(frames),
-                'court_detection_rate': court_detections / len(frames),
+                'ball_detection_rate': ball_detections / num_frames,
+                'court_detection_rate': court_detections / num_frames,
                 'court_calibration_source': 'manual' if using_manual_calibration else 'automatic',
                 'bounces_detected': len(bounce_frames),
                 'shots_segmented': len(shots),
@@ -1224,7 +1233,7 @@ class ComprehensiveCalibrator:
         # Save output
         if output_path:
             with open(output_path, 'w') as f:
-                json.dump(result, f, indent=2, default=str)
+                json.dump(result, f, indent=2)
             print(f"\nResults saved to: {output_path}")
 
         # Print summary
@@ -1232,100 +1241,123 @@ class ComprehensiveCalibrator:
 
         return result
 
+    def _iter_shot_poses(self, frames, shots):
+        """Yield (poses, previous frame poses) for every shot. MediaPipe runs on a worker thread one shot ahead,
+        so the next shot's poses are detected while this shot's metrics are computed"""
+        # Shots can share frames, e.g. one's contact frame is the frame before another's, so every frame's
+        # poses are detected once
+        pose_cache = {}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            for shot in shots:
+                future = executor.submit(self._detect_shot_poses, frames, shot['contact_frame'], pose_cache)
+                if pending is not None:
+                    yield pending.result()
+                pending = future
+            if pending is not None:
+                yield pending.result()
+
+    def _detect_shot_poses(self, frames, contact_frame, pose_cache):
+        """Detect the poses at a shot's contact frame and, when the shot gets analyzed, at the frame before it"""
+        if contact_frame not in frames:
+            return [], None
+        poses = self._detect_frame_poses(frames, contact_frame, pose_cache)
+        if not poses or contact_frame == 0:
+            return poses, None
+        camera_angle = self.pose_analyzer.detect_camera_angle(poses[0])
+        if camera_angle and not camera_angle.get('suitable_for_analysis', True):
+            return poses, None
+        return poses, self._detect_frame_poses(frames, contact_frame - 1, pose_cache)
+
+    def _detect_frame_poses(self, frames, frame_idx, pose_cache):
+        """Detect the poses in a frame, reusing them when the frame was already detected"""
+        if frame_idx not in pose_cache:
+            pose_cache[frame_idx] = self.pose_analyzer.detect(frames[frame_idx])
+        return pose_cache[frame_idx]
+
     def _generate_summary(self, shots, camera_angles, body_scales, fps):
         """Generate statistical summary of calibration data"""
         if not shots:
             return {'error': 'No shots analyzed'}
 
+        # One row per shot and one column per metric, NaN where the metric is missing
+        metric_names = ['velocity_normalized', 'ball_speed_mph', 'hip_shoulder_separation', 'knee_bend']
+        metrics = np.array([[np.nan if s[name] is None else s[name] for name in metric_names] for s in shots],
+                           dtype=np.float64)
+
         # Filter to only successful shots (landed in)
-        successful_shots = [s for s in shots if s['outcome'] == 'in']
+        outcomes = [s['outcome'] for s in shots]
+        outcome_counts = Counter(outcomes)
+        successful_shots = np.array(outcomes) == 'in'
 
         # Group by stroke type
         by_type = {}
-        for shot in shots:
-            stroke = shot['stroke_type']
-            if stroke not in by_type:
-                by_type[stroke] = []
-            by_type[stroke].append(shot)
-
-        def calc_stats(values):
-            """Calculate percentile statistics"""
-            values = [v for v in values if v is not None]
-            if not values:
+        for i, shot in enumerate(shots):
+            by_type.setdefault(shot['stroke_type'], []).append(i)
+
+        def calc_stats(name, selected=slice(None)):
+            """Calculate percentile statistics of a metric over the selected shots"""
+            arr = metrics[selected, metric_names.index(name)]
+            arr = arr[~np.isnan(arr)]
+            if len(arr) == 0:
                 return None
-            arr = np.array(values)
+            p10, p25, median, p75, p90 = np.percentile(arr, [10, 25, 50, 75, 90]).tolist()
             return {
                 'count': len(arr),
-                'min': float(np.min(arr)),
-                'max': float(np.max(arr)),
-                'mean': float(np.mean(arr)),
-                'median': float(np.median(arr)),
-                'std': float(np.std(arr)),
-                'p10': float(np.percentile(arr, 10)),
-                'p25': float(np.percentile(arr, 25)),
-                'p75': float(np.percentile(arr, 75)),
-                'p90': float(np.percentile(arr, 90))
+                'min': float(arr.min()),
+                'max': float(arr.max()),
+                'mean': float(arr.mean()),
+                'median': median,
+                'std': float(arr.std()),
+                'p10': p10,
+                'p25': p25,
+                'p75': p75,
+                'p90': p90
             }
 
         summary = {
             'total_shots': len(shots),
-            'successful_shots': len(successful_shots),
-            'success_rate': len(successful_shots) / len(shots) if shots else 0,
+            'successful_shots': int(successful_shots.sum()),
+            'success_rate': float(successful_shots.mean()),
 
             'stroke_distribution': {k: len(v) for k, v in by_type.items()},
 
-            'outcome_distribution': {
-                'in': len([s for s in shots if s['outcome'] == 'in']),
-                'out': len([s for s in shots if s['outcome'] == 'out']),
-                'unknown': len([s for s in shots if s['outcome'] == 'unknown'])
-            },
+            'outcome_distribution': {outcome: outcome_counts[outcome] for outcome in ('in', 'out', 'unknown')},
 
             # All shots
-            'all_shots': {
-                'velocity_normalized': calc_stats([s['velocity_normalized'] for s in shots]),
-                'ball_speed_mph': calc_stats([s['ball_speed_mph'] for s in shots]),
-                'hip_shoulder_separation': calc_stats([s['hip_shoulder_separation'] for s in shots]),
-                'knee_bend': calc_stats([s['knee_bend'] for s in shots])
-            },
+            'all_shots': {name: calc_stats(name) for name in metric_names},
 
             # Only successful shots (key for calibration!)
-            'successful_shots_only': {
-                'velocity_normalized': calc_stats([s['velocity_normalized'] for s in successful_shots]),
-                'ball_speed_mph': calc_stats([s['ball_speed_mph'] for s in successful_shots]),
-                'hip_shoulder_separation': calc_stats([s['hip_shoulder_separation'] for s in successful_shots]),
-                'knee_bend': calc_stats([s['knee_bend'] for s in successful_shots])
-            },
+            'successful_shots_only': {name: calc_stats(name, successful_shots) for name in metric_names},
 
             # By stroke type
             'by_stroke_type': {}
         }
 
         for stroke_type, stroke_shots in by_type.items():
-            successful = [s for s in stroke_shots if s['outcome'] == 'in']
+            successful = np.array(stroke_shots)[successful_shots[stroke_shots]]
             summary['by_stroke_type'][stroke_type] = {
                 'total': len(stroke_shots),
                 'successful': len(successful),
-                'velocity_normalized': calc_stats([s['velocity_normalized'] for s in successful]),
-                'ball_speed_mph': calc_stats([s['ball_speed_mph'] for s in successful])
+                'velocity_normalized': calc_stats('velocity_normalized', successful),
+                'ball_speed_mph': calc_stats('ball_speed_mph', successful)
             }
 
         # Camera angle distribution
         if camera_angles:
             summary['camera_angles'] = {
-                'view_types': {},
+                'view_types': dict(Counter(a.get('view_type', 'unknown') for a in camera_angles)),
                 'suitable_for_analysis': sum(1 for a in camera_angles if a.get('suitable_for_analysis', True))
             }
-            for angle in camera_angles:
-                vt = angle.get('view_type', 'unknown')
-                summary['camera_angles']['view_types'][vt] = summary['camera_angles']['view_types'].get(vt, 0) + 1
 
         # Body scale consistency
         if body_scales:
-            torso_lengths = [b['torso_length'] for b in body_scales]
+            torso_lengths = np.array([b['torso_length'] for b in body_scales])
+            mean_torso, std_torso = float(torso_lengths.mean()), float(torso_lengths.std())
             summary['body_scale_consistency'] = {
-                'mean_torso_length': float(np.mean(torso_lengths)),
-                'std_torso_length': float(np.std(torso_lengths)),
-                'cv': float(np.std(torso_lengths) / np.mean(torso_lengths)) if np.mean(torso_lengths) > 0 else None
+                'mean_torso_length': mean_torso,
+                'std_torso_length': std_torso,
+                'cv': std_torso / mean_torso if mean_torso > 0 else None
             }
 
         return summary
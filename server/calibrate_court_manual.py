@@ -38,6 +38,7 @@ class ManualCourtCalibrator:
     def __init__(self):
         self.points = []
         self.frame = None
+        self.background = None  # Frame with the static instructions, drawn once per calibration
         self.window_name = "Court Calibration"
         self.calibration_mode = 'full'  # 'full' or 'half'
         self.court = CourtGeometry()
@@ -47,11 +48,11 @@ class ManualCourtCalibrator:
             self.points.append((x, y))
             self._draw()
 
-    def _draw(self):
+    def _draw_background(self):
+        """Draw the instructions that never change on a copy of the frame, _draw starts from it"""
         vis = self.frame.copy()
-        h, w = vis.shape[:2]
 
-        # Instructions
+        # Instructions, the points counter line is left empty and drawn by _draw
         instructions = [
             "COURT CALIBRATION",
             "",
@@ -61,7 +62,7 @@ class ManualCourtCalibrator:
             "  3. FAR baseline - RIGHT corner",
             "  4. FAR baseline - LEFT corner",
             "",
-            f"Points clicked: {len(self.points)}/4",
+            "",
             "",
             "Keys:",
             "  ENTER - Confirm (when 4 points set)",
@@ -81,6 +82,15 @@ class ManualCourtCalibrator:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
             y_offset += 20
 
+        self.background = vis
+
+    def _draw(self):
+        vis = self.background.copy()
+        h, w = vis.shape[:2]
+
+        cv2.putText(vis, f"Points clicked: {len(self.points)}/4", (20, 190),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
         # Draw points
         colors = [(0, 0, 255), (0, 255, 0), (255, 0, 0), (255, 255, 0)]
         labels = ["1: Baseline L", "2: Baseline R", "3: Far R", "4: Far L"]
@@ -93,10 +103,7 @@ class ManualCourtCalibrator:
 
         # Draw lines between points
         if len(self.points) >= 2:
-            for i in range(len(self.points) - 1):
-                cv2.line(vis, self.points[i], self.points[i+1], (0, 255, 0), 2)
-            if len(self.points) == 4:
-                cv2.line(vis, self.points[3], self.points[0], (0, 255, 0), 2)
+            cv2.polylines(vis, [np.array(self.points, dtype=np.int32)], len(self.points) == 4, (0, 255, 0), 2)
 
         # Show mode
         mode_text = f"Mode: {'Full Court' if self.calibration_mode == 'full' else 'Half Court (your side)'}"
@@ -114,6 +121,7 @@ class ManualCourtCalibrator:
         """
         self.frame = frame.copy()
         self.points = []
+        self._draw_background()
         h, w = frame.shape[:2]
 
         cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
@@ -123,7 +131,7 @@ class ManualCourtCalibrator:
         self._draw()
 
         while True:
-            key = cv2.waitKey(1) & 0xFF
+            key = cv2.waitKey(20) & 0xFF  # ~50 Hz is plenty for clicks and keys
 
             if key == 27:  # ESC - cancel
                 cv2.destroyWindow(self.window_name)
@@ -171,21 +179,17 @@ class ManualCourtCalibrator:
         # Compute homography: pixel -> court coordinates
         homography, _ = cv2.findHomography(pixel_corners, court_corners)
 
-        # Test the homography
-        test_results = []
-        for i, (px, court) in enumerate(zip(self.points, court_corners)):
-            result = cv2.perspectiveTransform(
-                np.float32([[px]]), homography
-            )[0][0]
-            error = np.sqrt((result[0] - court[0])**2 + (result[1] - court[1])**2)
-            test_results.append({
-                'pixel': list(px),
-                'expected_court': list(court),
-                'actual_court': [float(result[0]), float(result[1])],
-                'error_meters': float(error)
-            })
-
-        avg_error = np.mean([t['error_meters'] for t in test_results])
+        # Test the homography on all corners at once
+        results = cv2.perspectiveTransform(pixel_corners.reshape(-1, 1, 2), homography).reshape(-1, 2)
+        errors = np.hypot(*(results - court_corners).T)
+        test_results = [{
+            'pixel': list(px),
+            'expected_court': court.tolist(),
+            'actual_court': result.tolist(),
+            'error_meters': error
+        } for px, court, result, error in zip(self.points, court_corners, results, errors.tolist())]
+
+        avg_error = errors.mean()
 
         return {
             'mode': self.calibration_mode,
@@ -206,19 +210,25 @@ class ManualCourtCalibrator:
 
 
 def pixel_to_court(pixel_pos, homography):
-    """Convert pixel position to court coordinates"""
-    point = np.float32([[pixel_pos]])
-    result = cv2.perspectiveTransform(point, np.array(homography))
-    return (float(result[0][0][0]), float(result[0][0][1]))
+    """Convert a pixel position to a court coordinates tuple, or an (N, 2) array of positions to an (N, 2) array"""
+    homography = np.asarray(homography, dtype=np.float64)
+    points = np.asarray(pixel_pos, dtype=np.float64)
+    projected = points.reshape(-1, 2) @ homography[:, :2].T + homography[:, 2]
+    court = projected[:, :2] / projected[:, 2:]
+    if points.ndim == 1:
+        return (float(court[0, 0]), float(court[0, 1]))
+    return court
 
 
 def is_in_court(court_pos, court_width=8.23, court_length=23.77, margin=0.3):
-    """Check if position is in court bounds"""
-    x, y = court_pos
-    return (
-        -margin <= x <= court_width + margin and
-        -margin <= y <= court_length + margin
+    """Check if a position is in court bounds, or get a boolean mask for an (N, 2) array of positions"""
+    court_pos = np.asarray(court_pos)
+    x, y = court_pos[..., 0], court_pos[..., 1]
+    in_court = (
+        (-margin <= x) & (x <= court_width + margin) &
+        (-margin <= y) & (y <= court_length + margin)
     )
+    return bool(in_court) if court_pos.ndim == 1 else in_court
 
 
 def load_calibration(path):
@@ -244,48 +254,24 @@ def visualize_calibration(frame, calibration):
     court_length = calibration['court_dimensions']['length']
     court_width = calibration['court_dimensions']['width']
 
-    # Draw court outline
-    court_points = [
-        (0, 0), (court_width, 0),
-        (court_width, court_length), (0, court_length), (0, 0)
-    ]
-
-    for i in range(len(court_points) - 1):
-        p1 = cv2.perspectiveTransform(
-            np.float32([[court_points[i]]]), inv_homography
-        )[0][0]
-        p2 = cv2.perspectiveTransform(
-            np.float32([[court_points[i+1]]]), inv_homography
-        )[0][0]
-        cv2.line(vis, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])),
-                (0, 255, 0), 2)
-
-    # Draw service line (6.4m from baseline)
-    service_line = [
-        (0, 6.4), (court_width, 6.4)
-    ]
-    p1 = cv2.perspectiveTransform(
-        np.float32([[service_line[0]]]), inv_homography
-    )[0][0]
-    p2 = cv2.perspectiveTransform(
-        np.float32([[service_line[1]]]), inv_homography
-    )[0][0]
-    cv2.line(vis, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])),
-            (0, 255, 255), 2)
+    # Draw court outline, its corners are the clicked pixel corners the homography was fitted to
+    cv2.polylines(vis, [np.int32(calibration['pixel_corners'])], True, (0, 255, 0), 2)
+
+    # Service line (6.4m from baseline) and net line ends, warped in one call
+    court_points = np.float32([
+        [0, 6.4], [court_width, 6.4],
+        [0, court_length / 2], [court_width, court_length / 2],
+    ])
+    pixel_points = cv2.perspectiveTransform(court_points.reshape(-1, 1, 2), inv_homography)
+    pixel_points = pixel_points.reshape(-1, 2).astype(np.int32)
+
+    # Draw service line
+    cv2.line(vis, tuple(pixel_points[0].tolist()), tuple(pixel_points[1].tolist()), (0, 255, 255), 2)
 
     # Draw center line
     if calibration['mode'] == 'full':
         # Net line
-        net_y = court_length / 2
-        net_line = [(0, net_y), (court_width, net_y)]
-        p1 = cv2.perspectiveTransform(
-            np.float32([[net_line[0]]]), inv_homography
-        )[0][0]
-        p2 = cv2.perspectiveTransform(
-            np.float32([[net_line[1]]]), inv_homography
-        )[0][0]
-        cv2.line(vis, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])),
-                (255, 0, 0), 3)
+        cv2.line(vis, tuple(pixel_points[2].tolist()), tuple(pixel_points[3].tolist()), (255, 0, 0), 3)
 
     # Add info text
     cv2.putText(vis, f"Mode: {calibration['mode']}", (20, 30),
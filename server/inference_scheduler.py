@@ -0,0 +1,54 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchedInferenceScheduler:
+    """
+    Coalesce concurrent ball detection requests into a single batched forward pass
+    """
+    def __init__(self, ball_detector, batch_size=8, max_batch_delay_ms=10):
+        self.ball_detector = ball_detector
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay_ms / 1000.
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, frames):
+        """ Queue a 3-frame window for detection
+        :params
+            frames: at least 3 consecutive frames prepared with BallDetector.prepare_frame, the latest one last
+        :return
+            future resolving to the (x, y) ball point of the latest frame
+        """
+        future = Future()
+        self.requests.put((list(frames), future))
+        return future
+
+    def _next_batch(self):
+        """ Block for the first request, then gather more until the batch is full or the delay runs out """
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                ball_points = self.ball_detector.infer_model_batched([frames for frames, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), ball_point in zip(batch, ball_points):
+                future.set_result(ball_point)
@@ -5,22 +5,32 @@ from ball_detection.court_reference import CourtReference
 from ball_detection.bounce_detector import BounceDetector
 from person_detector import PersonDetector
 from ball_detection.ball_detector import BallDetector
+from ball_detection.inference import compile_model
 from court_detection.utils import scene_detect
 import argparse
 import torch
 
-def read_video(path_video):
+def read_video(path_video, chunk_size=16):
+    """ Yield the frames of a video in chunks, so the whole video never has to sit in memory """
     cap = cv2.VideoCapture(path_video)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    frames = []
+    chunk = []
     while cap.isOpened():
         ret, frame = cap.read()
-        if ret:
-            frames.append(frame)
-        else:
-            break    
+        if not ret:
+            break
+        chunk.append(frame)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
     cap.release()
-    return frames, fps
+    if chunk:
+        yield chunk
+
+def get_video_fps(path_video):
+    cap = cv2.VideoCapture(path_video)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    cap.release()
+    return fps
 
 def get_court_img():
     court_reference = CourtReference()
@@ -33,7 +43,7 @@ def main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, pe
          draw_trace=False, trace=7):
     """
     :params
-        frames: list of original images
+        frames: iterable of original images, in order
         scenes: list of beginning and ending of video fragment
         bounces: list of image numbers where ball touches the ground
         ball_track: list of (x,y) ball coordinates
@@ -44,9 +54,9 @@ def main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, pe
         draw_trace: whether to draw ball trace
         trace: the length of ball trace
     :return
-        imgs_res: list of resulting images
+        generator of resulting images
     """
-    imgs_res = []
+    frames = iter(frames)
     width_minimap = 166
     height_minimap = 350
     is_track = [x is not None for x in homography_matrices] 
@@ -60,7 +70,8 @@ def main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, pe
             court_img = get_court_img()
 
             for i in range(scenes[num_scene][0], scenes[num_scene][1]):
-                img_res = frames[i]
+                frame = next(frames)
+                img_res = frame
                 inv_mat = homography_matrices[i]
 
                 # draw ball trajectory
@@ -71,7 +82,7 @@ def main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, pe
                                 if ball_track[i-j][0]:
                                     draw_x = int(ball_track[i-j][0])
                                     draw_y = int(ball_track[i-j][1])
-                                    img_res = cv2.circle(frames[i], (draw_x, draw_y),
+                                    img_res = cv2.circle(frame, (draw_x, draw_y),
                                     radius=3, color=(0, 255, 0), thickness=2)
                     else:    
                         img_res = cv2.circle(img_res , (int(ball_track[i][0]), int(ball_track[i][1])), radius=5,
@@ -118,19 +129,21 @@ def main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, pe
 
                 minimap = cv2.resize(minimap, (width_minimap, height_minimap))
                 img_res[30:(30 + height_minimap), (width - 30 - width_minimap):(width - 30), :] = minimap
-                imgs_res.append(img_res)
+                yield img_res
 
         else:    
-            imgs_res = imgs_res + frames[scenes[num_scene][0]:scenes[num_scene][1]] 
-    return imgs_res        
+            for i in range(scenes[num_scene][0], scenes[num_scene][1]):
+                yield next(frames)
  
 def write(imgs_res, fps, path_output_video):
-    height, width = imgs_res[0].shape[:2]
-    out = cv2.VideoWriter(path_output_video, cv2.VideoWriter_fourcc(*'DIVX'), fps, (width, height))
-    for num in range(len(imgs_res)):
-        frame = imgs_res[num]
+    out = None
+    for frame in imgs_res:
+        if out is None:
+            height, width = frame.shape[:2]
+            out = cv2.VideoWriter(path_output_video, cv2.VideoWriter_fourcc(*'DIVX'), fps, (width, height))
         out.write(frame)
-    out.release()    
+    if out is not None:
+        out.release()
 
 
 if __name__ == '__main__':
@@ -144,20 +157,40 @@ if __name__ == '__main__':
     args = parser.parse_args()
     
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    frames, fps = read_video(args.path_input_video) 
+    # Batch the detectors' forward passes on the GPU, batches of full-size activations don't fit CPU memory well
+    batch_size = 16 if device == 'cuda' else 1
+    fps = get_video_fps(args.path_input_video)
     scenes = scene_detect(args.path_input_video)    
 
-    print('ball detection')
     ball_detector = BallDetector(args.path_ball_track_model, device)
-    ball_track = ball_detector.infer_model(frames)
-
-    print('court detection')
     court_detector = CourtDetectorNet(args.path_court_model, device)
-    homography_matrices, kps_court = court_detector.infer_model(frames)
-
-    print('person detection')
     person_detector = PersonDetector(device)
-    persons_top, persons_bottom = person_detector.track_players(frames, homography_matrices, filter_players=False)
+    # Compiling only pays off on CUDA, compile_model leaves the models alone anywhere else
+    ball_detector.model = compile_model(ball_detector.model, device,
+                                       (batch_size, 9, ball_detector.height, ball_detector.width),
+                                       ball_detector.input_dtype, args.path_ball_track_model)
+    court_detector.model = compile_model(court_detector.model, device, (batch_size, 3, 360, 640),
+                                        court_detector.input_dtype, args.path_court_model)
+
+    # First pass: run the detectors chunk by chunk, keeping only their results. The ball model looks at
+    # 3 consecutive frames, so the last 2 frames and the last prediction carry over between chunks
+    print('ball, court and person detection')
+    ball_track, homography_matrices, kps_court, persons_top, persons_bottom = [], [], [], [], []
+    ball_context = []
+    prev_ball = None
+    for frames in read_video(args.path_input_video):
+        chunk_track = ball_detector.infer_model(ball_context + frames, prev_ball, batch_size)[len(ball_context):]
+        ball_context = (ball_context + frames)[-2:]
+        prev_ball = list(chunk_track[-1])
+        ball_track += chunk_track
+
+        chunk_matrices, chunk_kps = court_detector.infer_model(frames, batch_size, verbose=not kps_court)
+        homography_matrices += chunk_matrices
+        kps_court += chunk_kps
+
+        chunk_top, chunk_bottom = person_detector.track_players(frames, chunk_matrices, filter_players=False)
+        persons_top += chunk_top
+        persons_bottom += chunk_bottom
 
     # bounce detection
     bounce_detector = BounceDetector(args.path_bounce_model)
@@ -165,12 +198,9 @@ if __name__ == '__main__':
     y_ball = [x[1] for x in ball_track]
     bounces = bounce_detector.predict(x_ball, y_ball)
 
+    # Second pass: decode the video again and draw and write it frame by frame
+    frames = (frame for chunk in read_video(args.path_input_video) for frame in chunk)
     imgs_res = main(frames, scenes, bounces, ball_track, homography_matrices, kps_court, persons_top, persons_bottom,
                     draw_trace=True)
 
     write(imgs_res, fps, args.path_output_video)
-
-
-
-
-
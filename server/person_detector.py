@@ -4,7 +4,7 @@ import torch
 from court_reference import CourtReference
 from scipy import signal
 import numpy as np
-from scipy.spatial import distance
+import math
 from tqdm import tqdm
 
 class PersonDetector():
@@ -24,10 +24,10 @@ class PersonDetector():
         
     def detect(self, image, person_min_score=0.85): 
         PERSON_LABEL = 1
-        frame_tensor = image.transpose((2, 0, 1)) / 255
+        frame_tensor = image.transpose((2, 0, 1)).astype(np.float32) / 255
         frame_tensor = torch.from_numpy(frame_tensor).unsqueeze(0).float().to(self.dtype)
         
-        with torch.no_grad():
+        with torch.inference_mode():
             preds = self.detection_model(frame_tensor)
             
         persons_boxes = []
@@ -39,24 +39,41 @@ class PersonDetector():
         return persons_boxes, probs
     
     def detect_top_and_bottom_players(self, image, inv_matrix, filter_players=False):
-        matrix = cv2.invert(inv_matrix)[1]
-        mask_top_court = cv2.warpPerspective(self.ref_top_court, matrix, image.shape[1::-1])
-        mask_bottom_court = cv2.warpPerspective(self.ref_bottom_court, matrix, image.shape[1::-1])
         person_bboxes_top, person_bboxes_bottom = [], []
 
         bboxes, probs = self.detect(image, person_min_score=0.85)
         if len(bboxes) > 0:
             person_points = [[int((bbox[2] + bbox[0]) / 2), int(bbox[3])] for bbox in bboxes]
             person_bboxes = list(zip(bboxes, person_points))
-  
-            person_bboxes_top = [pt for pt in person_bboxes if mask_top_court[pt[1][1]-1, pt[1][0]] == 1]
-            person_bboxes_bottom = [pt for pt in person_bboxes if mask_bottom_court[pt[1][1] - 1, pt[1][0]] == 1]
+
+            # Look the feet points up in the reference masks instead of warping both masks into the image
+            feet_points = np.array([[x, y - 1] for x, y in person_points], dtype=np.float64)
+            in_top_court = self.court_mask_values(self.ref_top_court, feet_points, inv_matrix)
+            in_bottom_court = self.court_mask_values(self.ref_bottom_court, feet_points, inv_matrix)
+            person_bboxes_top = [pt for pt, inside in zip(person_bboxes, in_top_court) if inside == 1]
+            person_bboxes_bottom = [pt for pt, inside in zip(person_bboxes, in_bottom_court) if inside == 1]
 
             if filter_players:
+                matrix = cv2.invert(inv_matrix)[1]
                 person_bboxes_top, person_bboxes_bottom = self.filter_players(person_bboxes_top, person_bboxes_bottom,
                                                                               matrix)
         return person_bboxes_top, person_bboxes_bottom
 
+    def court_mask_values(self, mask, points, inv_matrix):
+        """
+        Sample a reference court mask at image points, as warping the mask into the image with nearest-neighbour
+        interpolation and indexing it would
+        """
+        ref_points = cv2.perspectiveTransform(points.reshape(-1, 1, 2), inv_matrix).reshape(-1, 2)
+        values = np.zeros(len(ref_points), dtype=mask.dtype)
+        with np.errstate(invalid='ignore'):
+            ref_points = np.rint(ref_points)
+            valid = ((ref_points[:, 0] >= 0) & (ref_points[:, 0] < mask.shape[1]) &
+                     (ref_points[:, 1] >= 0) & (ref_points[:, 1] < mask.shape[0]))
+        ref_points = ref_points[valid].astype(np.int64)
+        values[valid] = mask[ref_points[:, 1], ref_points[:, 0]]
+        return values
+
     def filter_players(self, person_bboxes_top, person_bboxes_bottom, matrix):
         """
         Leave one person at the top and bottom of the tennis court
@@ -66,11 +83,11 @@ class PersonDetector():
         center_top_court = trans_kps[0][0]
         center_bottom_court = trans_kps[1][0]
         if len(person_bboxes_top) > 1:
-            dists = [distance.euclidean(x[1], center_top_court) for x in person_bboxes_top]
+            dists = [math.dist(x[1], center_top_court) for x in person_bboxes_top]
             ind = dists.index(min(dists))
             person_bboxes_top = [person_bboxes_top[ind]]
         if len(person_bboxes_bottom) > 1:
-            dists = [distance.euclidean(x[1], center_bottom_court) for x in person_bboxes_bottom]
+            dists = [math.dist(x[1], center_bottom_court) for x in person_bboxes_bottom]
             ind = dists.index(min(dists))
             person_bboxes_bottom = [person_bboxes_bottom[ind]]
         return person_bboxes_top, person_bboxes_bottom
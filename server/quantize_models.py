@@ -0,0 +1,110 @@
+import argparse
+import glob
+import os
+import cv2
+import numpy as np
+import torch
+from ball_detection.ball_detector import BallDetector
+from ball_detection.tracknet import BallTrackerNet
+from ball_detection.inference import quantize_model, quantized_model_path, to_model_input
+
+# Resolve model paths relative to project root, as ball_detection_api.py does
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BALL_MODEL_PATH = os.path.join(PROJECT_ROOT, 'model_weights', 'model_best.pt')
+COURT_MODEL_PATH = os.path.join(PROJECT_ROOT, 'model_weights', 'model_tennis_court_det.pt')
+INPUT_SIZE = (640, 360)
+
+def read_calibration_windows(video_paths, num_windows, stride):
+    """ Sample windows of 3 consecutive frames, resized to the model input size, every stride frames
+    :params
+        video_paths: list of videos to sample from
+        num_windows: number of windows to collect in total
+        stride: frames between the starts of two windows of the same video
+    :return
+        list of [frame, next frame, frame after that] windows
+    """
+    windows = []
+    per_video = int(np.ceil(num_windows / len(video_paths)))
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        num_frame = 0
+        taken = 0
+        while taken < per_video:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if num_frame % stride < 3:
+                frames.append(cv2.resize(frame, INPUT_SIZE))
+                if len(frames) == 3:
+                    windows.append(frames)
+                    frames = []
+                    taken += 1
+            num_frame += 1
+        cap.release()
+    return windows[:num_windows]
+
+def load_fp32_model(path_model, input_channels, out_channels):
+    model = BallTrackerNet(input_channels=input_channels, out_channels=out_channels)
+    model.load_state_dict(torch.load(path_model, map_location='cpu'))
+    return model.eval()
+
+def ball_inputs(windows):
+    for frames in windows:
+        # The ball model takes the latest frame first
+        yield to_model_input(torch.from_numpy(np.concatenate(frames[::-1], axis=2)), torch.float32).unsqueeze(0)
+
+def court_inputs(windows):
+    for frames in windows:
+        yield to_model_input(torch.from_numpy(frames[-1]), torch.float32).unsqueeze(0)
+
+def compare_ball_models(fp32_model, int8_model, windows, max_dist=2):
+    """ Fraction of windows where both models agree on the ball: both miss it, or both find it within max_dist """
+    detector = BallDetector(device='cpu')
+    agree = 0
+    with torch.inference_mode():
+        for inp in ball_inputs(windows):
+            points = [detector.postprocess(model(inp).argmax(dim=1)[0].numpy(), [None, None])
+                      for model in (fp32_model, int8_model)]
+            (x1, y1), (x2, y2) = points
+            if x1 is None or x2 is None:
+                agree += x1 is None and x2 is None
+            else:
+                agree += np.hypot(x1 - x2, y1 - y2) <= max_dist
+    return agree / len(windows)
+
+def compare_court_models(fp32_model, int8_model, windows):
+    """ Largest difference between the two models' keypoint heatmaps """
+    max_diff = 0.
+    with torch.inference_mode():
+        for inp in court_inputs(windows):
+            heatmaps = [torch.sigmoid(model(inp)) for model in (fp32_model, int8_model)]
+            max_diff = max(max_diff, (heatmaps[0] - heatmaps[1]).abs().max().item())
+    return max_diff
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build INT8 versions of the ball and court models for CPU inference')
+    parser.add_argument('--videos', type=str, nargs='*', help='tennis videos to calibrate on, defaults to uploads/')
+    parser.add_argument('--num_frames', type=int, default=100, help='number of calibration samples')
+    parser.add_argument('--stride', type=int, default=15, help='frames between two calibration samples')
+    args = parser.parse_args()
+
+    video_paths = args.videos or sorted(glob.glob(os.path.join('uploads', '*')))
+    if not video_paths:
+        parser.error('no calibration videos given and uploads/ is empty')
+    windows = read_calibration_windows(video_paths, args.num_frames, args.stride)
+    print(f'Calibrating on {len(windows)} samples from {len(video_paths)} videos '
+          f'with the {torch.backends.quantized.engine} quantized engine')
+
+    fp32_ball = load_fp32_model(BALL_MODEL_PATH, 9, 256)
+    # The 256-way intensity head decides the heatmap directly, so it stays in fp32
+    int8_ball = quantize_model(load_fp32_model(BALL_MODEL_PATH, 9, 256), ball_inputs(windows),
+                               float_modules=('conv18',))
+    torch.jit.save(int8_ball, quantized_model_path(BALL_MODEL_PATH))
+    print(f'Ball model: detections agree on {compare_ball_models(fp32_ball, int8_ball, windows):.1%} of samples')
+
+    fp32_court = load_fp32_model(COURT_MODEL_PATH, 3, 15)
+    int8_court = quantize_model(load_fp32_model(COURT_MODEL_PATH, 3, 15), court_inputs(windows))
+    torch.jit.save(int8_court, quantized_model_path(COURT_MODEL_PATH))
+    print(f'Court model: max heatmap difference {compare_court_models(fp32_court, int8_court, windows):.4f}')
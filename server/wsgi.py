@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production serving:
+
+    gunicorn -w 1 -k gthread --threads 16 -b 0.0.0.0:5001 --timeout 600 wsgi:application
+
+A single worker keeps every request on one batching scheduler and one copy of the models.
+"""
+from ball_detection_api import app, device, warmup_models
+
+if device == 'cuda':
+    warmup_models()
+
+application = app